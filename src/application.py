@@ -1,17 +1,22 @@
-import os
+import util
+import time
 import pygame as pg
+import profiler
 from menu import Menu
 
 class Application: # is this class like the game class in space invaders ?
     RESOLUTION = (1280, 800)
     FRAMES_PER_SECOND = 60 # limit the game speed 
     FRAME_TIME = 1.0/FRAMES_PER_SECOND
-    PROJECT_DIR = os.path.join(os.path.dirname(__file__), os.pardir)
+    PROJECT_DIR = util.PROJECT_DIR
 
-    def __init__(self):
+    def __init__(self, seed: int = None):
+        self.seed = seed
+        """Seed for every game played, or None for a new random one each time."""
         pg.init()
         self.screen = pg.display.set_mode(size=Application.RESOLUTION)
         self.frame_clock = pg.time.Clock()
+        self.frame_start = time.perf_counter()
 
     def run(self):
         while True: 
@@ -19,7 +24,18 @@ class Application: # is this class like the game class in space invaders ?
             g.main_menu()
             
     # Draw current display buffer to screen, then wait for next frame.
+    # Pass `rects` to only update those areas of the screen.
     # NOTE: Call at the end of a frame process (end of the running loop)
-    def wait_next_frame(self):
-        pg.display.flip() # update the screen 
-        self.frame_clock.tick(Application.FRAMES_PER_SECOND) # wait until next frame time
\ No newline at end of file
+    def wait_next_frame(self, rects: list[pg.Rect] = None):
+        if rects == None:
+            pg.display.flip() # update the screen 
+        else:
+            pg.display.update(rects)
+        profiler.lap('display.update')
+        self.frame_clock.tick(Application.FRAMES_PER_SECOND) # wait until next frame time
+        profiler.lap('wait')
+        self.frame_start = time.perf_counter()
+
+    def frame_time_left_ms(self):
+        """Milliseconds left in the current frame before it runs late."""
+        return Application.FRAME_TIME*1000 - (time.perf_counter() - self.frame_start)*1000
\ No newline at end of file
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import threading
+import pygame as pg
+from pygame import Surface
+
+from util import PROJECT_DIR
+
+SPRITE_DIR = os.path.join(PROJECT_DIR, 'resources', 'sprites')
+FONT_PATH = os.path.join(PROJECT_DIR, 'resources', 'fonts', 'Press Start 2P.ttf')
+
+ATLAS_WIDTH = 1024
+ATLAS_PADDING = 1
+ATLAS_MAX_SIZE = 128
+"""Sprites bigger than this on either side (the maze) stay on their own."""
+
+MENU_FRAMES = 154
+MENU_FRAME_SCALE = 0.7
+MENU_SHEET_WIDTH = 4096
+
+CACHE_VERSION = 1
+"""Bump when the atlas image or index format changes."""
+
+_images: dict[tuple, Surface] = {}
+_fonts: dict[int, pg.font.Font] = {}
+_atlas: tuple[Surface, dict[str, pg.Rect]] = None
+_menu_frames: 'FrameLoader' = None
+
+
+def prepare(surface: Surface) -> Surface:
+    """`surface` in the display's pixel format, once there is a display;
+    those blit much faster than freshly decoded images."""
+    if pg.display.get_surface() == None:
+        return surface
+    return surface.convert_alpha()
+
+
+def image(path: str) -> Surface:
+    """The image at `path` (relative to the project directory), decoded once
+    per process. Callers share the surface, so don't draw on it."""
+    key = ('image', path)
+    if key not in _images:
+        _images[key] = prepare(pg.image.load(os.path.join(PROJECT_DIR, path)))
+    return _images[key]
+
+
+def font(size: int) -> pg.font.Font:
+    """The game's font at `size`, loaded once per process."""
+    if size not in _fonts:
+        _fonts[size] = pg.font.Font(FONT_PATH, size)
+    return _fonts[size]
+
+
+def files_hash(paths: list[str], *params) -> str:
+    """Key of some files' contents (plus whatever `params` shape what's
+    built from them) for the on-disk cache."""
+    h = hashlib.sha1(f'{CACHE_VERSION}:{params}:'.encode())
+    for path in paths:
+        h.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def pack(images: dict[str, Surface], width: int) -> tuple[Surface, dict[str, pg.Rect]]:
+    """Pack `images` into one surface `width` pixels wide, in rows from
+    tallest to shortest. Returns the sheet and each image's rect on it."""
+    rects = {}
+    x = y = row_height = 0
+    for name in sorted(images, key=lambda n: (-images[n].get_height(), n)):
+        w, h = images[name].get_size()
+        if x + w > width:
+            x, y = 0, y + row_height + ATLAS_PADDING
+            row_height = 0
+        rects[name] = pg.Rect(x, y, w, h)
+        x += w + ATLAS_PADDING
+        row_height = max(row_height, h)
+
+    sheet = Surface((width, y + row_height), pg.SRCALPHA)
+    for name, rect in rects.items():
+        sheet.blit(images[name], rect)
+    return sheet, rects
+
+
+def load_sheet(name: str, key: str, build) -> tuple[Surface, dict[str, pg.Rect]]:
+    """The sheet `build()` returns, cached under `cache/` in the project
+    directory as `{name}_{key}`; `key` should change with its inputs."""
+    cache_dir = os.path.join(PROJECT_DIR, 'cache')
+    base = os.path.join(cache_dir, f'{name}_{key}')
+    try:
+        with open(f'{base}.json') as f:
+            rects = {n: pg.Rect(r) for n, r in json.load(f).items()}
+        return pg.image.load(f'{base}.png'), rects
+    except (OSError, ValueError, TypeError, pg.error):
+        pass
+
+    sheet, rects = build()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        pg.image.save(sheet, f'{base}.png')
+        with open(f'{base}.json', 'w') as f:
+            json.dump({n: list(r) for n, r in rects.items()}, f)
+    except (OSError, pg.error):
+        pass # read-only checkout; just rebuild next time
+    return sheet, rects
+
+
+def sprite_path(name: str) -> str:
+    return os.path.join(SPRITE_DIR, f'{name}.png')
+
+
+def build_atlas(names: list[str]) -> tuple[Surface, dict[str, pg.Rect]]:
+    """Pack the small sprites among `names` into one surface."""
+    images = {}
+    for name in names:
+        img = pg.image.load(sprite_path(name))
+        if img.get_width() <= ATLAS_MAX_SIZE and img.get_height() <= ATLAS_MAX_SIZE:
+            images[name] = img
+    return pack(images, ATLAS_WIDTH)
+
+
+def load_atlas() -> tuple[Surface, dict[str, pg.Rect]]:
+    """`build_atlas` over every sprite, cached on disk by the sprites' hash."""
+    names = sorted(f[:-4] for f in os.listdir(SPRITE_DIR) if f.endswith('.png'))
+    key = files_hash([sprite_path(n) for n in names], ATLAS_WIDTH, ATLAS_PADDING, ATLAS_MAX_SIZE)
+    return load_sheet('atlas', key, lambda: build_atlas(names))
+
+
+def sprite(name: str) -> Surface:
+    """`resources/sprites/{name}.png`, cut from the shared atlas if it's on
+    it. Callers share the surface, so don't draw on it."""
+    global _atlas
+    if _atlas == None:
+        atlas, rects = load_atlas()
+        _atlas = (prepare(atlas), rects)
+
+    key = ('sprite', name)
+    if key not in _images:
+        atlas, rects = _atlas
+        if name in rects:
+            _images[key] = atlas.subsurface(rects[name])
+        else:
+            _images[key] = image(os.path.relpath(sprite_path(name), PROJECT_DIR))
+    return _images[key]
+
+
+class FrameLoader:
+    """
+    An animation's frames, loaded on a background thread.
+
+    Indexes like a list of surfaces, but frames that aren't loaded yet are
+    None. Built frames are packed into one sheet cached on disk, so later
+    runs load a single image instead of decoding and scaling each frame.
+    """
+    def __init__(self, name: str, paths: list[str], scale: float):
+        self.name = name
+        self.paths = paths
+        self.scale = scale
+        self.frames: list[Surface] = [None]*len(paths)
+        self.loaded = threading.Event()
+        """Set once every frame is in."""
+        self.thread = threading.Thread(target=self.load, daemon=True)
+        self.thread.start()
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, i: int) -> Surface:
+        return self.frames[i]
+
+    def build(self) -> tuple[Surface, dict[str, pg.Rect]]:
+        """Scale every frame, publishing each one as soon as it's ready."""
+        images = {}
+        for i, path in enumerate(self.paths):
+            img = pg.transform.rotozoom(pg.image.load(path), 0, self.scale)
+            images[str(i)] = img
+            self.frames[i] = prepare(img)
+        return pack(images, MENU_SHEET_WIDTH)
+
+    def load(self):
+        key = files_hash(self.paths, self.scale, MENU_SHEET_WIDTH, ATLAS_PADDING)
+        sheet, rects = load_sheet(self.name, key, self.build)
+        if self.frames[-1] == None: # came from the cache
+            sheet = prepare(sheet)
+            for i in range(len(self.frames)):
+                self.frames[i] = sheet.subsurface(rects[str(i)])
+        self.loaded.set()
+
+
+def menu_frames() -> FrameLoader:
+    """The menu's Pac Man animation. Starts loading on first call; shared
+    by every `Menu` after that."""
+    global _menu_frames
+    if _menu_frames == None:
+        paths = [os.path.join(PROJECT_DIR, 'pacman_img', f'tile{n}.png') for n in range(MENU_FRAMES)]
+        _menu_frames = FrameLoader('menu_frames', paths, MENU_FRAME_SCALE)
+    return _menu_frames
@@ -0,0 +1,103 @@
+"""Play many headless AI games across all cores and stream the results.
+
+    python batch.py --games 1000 --out results.jsonl
+
+Each game is a `Simulation` seeded with its own seed (`--seed` plus the
+game's number), so any single game can be replayed. One JSON object per
+game is appended to `--out` as soon as that game finishes."""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+
+import player_ai.player_ai as ai
+from maze_distance import MazeDistances
+from sim.replay import ReplayRecorder
+from sim.simulation import Simulation
+
+DEFAULT_MAX_TICKS = 60*Simulation.TICKS_PER_SECOND*10
+"""Games still going after this many ticks (ten minutes of play) are cut off."""
+
+
+def init_worker():
+    """Load everything a game needs once per process, not once per game."""
+    MazeDistances.get()
+
+
+def play_game(job: dict) -> dict:
+    """Play one seeded game to the end (or `max_ticks`) and summarize it."""
+    ai.enable_stats(job['stats'])
+    ai.new_game()
+    mode = ai.SearchMode[job['mode']]
+
+    ai_time = 0.0
+    decisions = 0
+    def controller(game):
+        nonlocal ai_time, decisions
+        start = time.perf_counter()
+        move = ai.next_move(game, depth=job['depth'], mode=mode, time_budget_ms=job['budget_ms'])
+        ai_time += time.perf_counter() - start
+        decisions += 1
+        return move
+
+    start = time.perf_counter()
+    game = Simulation(controller=controller, seed=job['seed'])
+    recorder = ReplayRecorder(game) if job['replays'] != None else None
+    game.run(max_ticks=job['max_ticks'])
+
+    result = {
+        'game': job['game'],
+        'seed': job['seed'],
+        'score': game.score,
+        'level': game.play_state.level,
+        'deaths': 3 - game.player.lives,
+        'ticks': game.ticks,
+        'finished': game.over,
+        'decisions': decisions,
+        'ai_time_s': ai_time,
+        'ai_ms_per_tick': 1000*ai_time/game.ticks if game.ticks > 0 else 0,
+        'wall_time_s': time.perf_counter() - start
+    }
+    if ai.stats != None:
+        result['ai_stats'] = ai.stats.summary()
+    if recorder != None:
+        result['replay'] = recorder.save(job['replays'])
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--mode', choices=[m.name for m in ai.SearchMode], default=ai.SearchMode.TT_MINIMAX.name)
+    parser.add_argument('--depth', type=int, default=1, help='search depth, if no --budget-ms')
+    parser.add_argument('--budget-ms', type=float, default=None, help='time per decision; deepens iteratively')
+    parser.add_argument('--max-ticks', type=int, default=DEFAULT_MAX_TICKS)
+    parser.add_argument('--stats', action='store_true', help='add search counters and histograms to each result')
+    parser.add_argument('--replays', metavar='DIR', help='save a replay of each game here')
+    parser.add_argument('--out', default='results.jsonl')
+    args = parser.parse_args(argv)
+
+    jobs = [{
+        'game': i,
+        'seed': args.seed + i,
+        'mode': args.mode,
+        'depth': args.depth,
+        'budget_ms': args.budget_ms,
+        'max_ticks': args.max_ticks,
+        'stats': args.stats,
+        'replays': args.replays
+    } for i in range(args.games)]
+
+    with open(args.out, 'a') as f, mp.Pool(args.workers, initializer=init_worker) as pool:
+        for done, result in enumerate(pool.imap_unordered(play_game, jobs), start=1):
+            f.write(json.dumps(result) + '\n')
+            f.flush()
+            print(f'[{done}/{args.games}] game {result["game"]}: score {result["score"]}, level {result["level"]}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+"""Benchmark the AI and simulation hot paths and compare runs.
+
+    python bench.py --out before.json
+    python bench.py --out after.json
+    python bench.py --compare before.json after.json
+
+Every benchmark runs on the same seeded positions, so two runs on the same
+machine differ only by the code. Results are written as JSON; `--compare`
+prints the change per benchmark and exits with status 1 if any got slower
+by more than `--threshold`."""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+import ghost_ai
+import player_ai.player_ai as ai
+from maze_distance import MazeDistances
+from player_ai.model import MState, MPlayer
+from sim.maze_state import MazeState
+from sim.simulation import Simulation
+from vector import Vector
+
+POSITION_TICKS = [300, 900, 1500, 2100]
+"""Ticks into the seeded game at which benchmark positions are taken."""
+
+GAME_TICKS = 3000
+"""Length of the headless games timed for throughput."""
+
+DEFAULT_THRESHOLD = 0.10
+
+
+def random_controller(seed: int):
+    """Steers Pac Man at random, reproducibly; cheap enough not to skew the
+    simulation's own timings."""
+    rng = random.Random(seed)
+    return lambda game: rng.choice(['up', 'down', 'left', 'right'])
+
+
+def seeded_games(seed: int) -> list[Simulation]:
+    """Games paused at each of `POSITION_TICKS`, all from one seeded game."""
+    games = []
+    for ticks in POSITION_TICKS:
+        game = Simulation(controller=random_controller(seed), seed=seed)
+        game.start()
+        while game.ticks < ticks and not game.over:
+            game.tick()
+        games.append(game)
+    return games
+
+
+def model_state(game: Simulation) -> MState:
+    return MState(
+        player=MPlayer(game.player.tile, game.player.facing),
+        maze=game.maze.maze,
+        ghosts=game.ghosts
+    )
+
+
+def measure(fn, min_time: float, repeat: int) -> dict:
+    """Time `fn()` (one call is one unit of work): calls are batched until a
+    batch takes `min_time` seconds, then `repeat` batches are timed. Like
+    `timeit`, the value reported is the best batch; slower ones measure
+    whatever else the machine was doing."""
+    fn() # warm up caches and tables
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls): fn()
+        if time.perf_counter() - start >= min_time: break
+        calls *= 2
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls): fn()
+        samples.append((time.perf_counter() - start)/calls*1e6)
+    return {
+        'value': min(samples),
+        'median': statistics.median(samples),
+        'unit': 'us',
+        'higher_is_better': False,
+        'calls': calls,
+        'repeat': repeat
+    }
+
+
+def cycle(items: list):
+    """Callable returning `items` in turn, forever."""
+    i = -1
+    def next_item():
+        nonlocal i
+        i = (i + 1) % len(items)
+        return items[i]
+    return next_item
+
+
+def model_benchmarks(states: list[MState], min_time: float, repeat: int) -> dict:
+    moves = [(st, st.player_moves()[0]) for st in states]
+    next_move = cycle(moves)
+    next_state = cycle(states)
+    children = [child for st in states for child in ai.explore_states(st).values()]
+    next_child = cycle(children)
+
+    benchmarks = {
+        'player_ai.step': lambda: measure(lambda: ai.step(*next_move()), min_time, repeat),
+        'player_ai.explore_states': lambda: measure(lambda: ai.explore_states(next_state()), min_time, repeat),
+        'player_ai.evaluate': lambda: measure(lambda: ai.evaluate(next_child()), min_time, repeat)
+    }
+    for depth in range(1, 6):
+        benchmarks[f'player_ai.minimax.d{depth}'] = \
+            lambda depth=depth: measure(lambda: ai.minimax(next_state(), depth), min_time, repeat)
+    return benchmarks
+
+
+def ghost_benchmarks(games: list[Simulation], min_time: float, repeat: int) -> dict:
+    calls = [
+        (g.tile, g.target, g.facing, g.mode)
+        for game in games for g in game.ghosts
+        if g.mode in ai.HOSTILE_MODES or g.mode == ghost_ai.GhostMode.FRIGHTENED
+    ]
+    calls = calls or [((13, 11), (1, 1), 'left', ghost_ai.GhostMode.CHASE)]
+    next_call = cycle(calls)
+    return {
+        'ghost_ai.get_next_move_tile': lambda: measure(lambda: ghost_ai.get_next_move_tile(*next_call()), min_time, repeat)
+    }
+
+
+def maze_benchmarks(games: list[Simulation], min_time: float, repeat: int) -> dict:
+    maze = games[-1].maze
+    tiles = [Vector(x, y) for y in range(MazeState.HEIGHT) for x in range(MazeState.WIDTH)]
+    def every_tile():
+        for v in tiles: maze.get_tile_state(v)
+    benchmarks = {'maze.get_tile_state.all_tiles': lambda: measure(every_tile, min_time, repeat)}
+
+    try:
+        import pygame as pg
+        import application # must come first; the front end's imports are circular
+        from maze import Maze
+    except ImportError:
+        return benchmarks # no pygame on this machine; the rest doesn't need it
+
+    class OffscreenPlay:
+        """What `Maze` needs from `Play`, drawing to a plain surface."""
+        def __init__(self):
+            self.screen = pg.Surface((1280, 800))
+        def mark_drawn(self, rect): pass
+        def mark_changed(self, rect): pass
+
+    view = Maze(maze, OffscreenPlay())
+    def full_draw():
+        view.shown = None
+        view.draw()
+    benchmarks['maze.draw'] = lambda: measure(view.draw, min_time, repeat)
+    benchmarks['maze.draw.full'] = lambda: measure(full_draw, min_time, repeat)
+    return benchmarks
+
+
+def game_throughput(seed: int, repeat: int, make_controller) -> dict:
+    """Ticks per second of whole headless games."""
+    samples = []
+    for _ in range(repeat):
+        ai.new_game()
+        game = Simulation(controller=make_controller(), seed=seed)
+        start = time.perf_counter()
+        game.run(max_ticks=GAME_TICKS)
+        samples.append(game.ticks/(time.perf_counter() - start))
+    return {
+        'value': max(samples),
+        'median': statistics.median(samples),
+        'unit': 'ticks/s',
+        'higher_is_better': True,
+        'ticks': game.ticks,
+        'repeat': repeat
+    }
+
+
+def game_benchmarks(seed: int, repeat: int) -> dict:
+    ai_controller = lambda game: ai.next_move(game, depth=1, mode=ai.SearchMode.TT_MINIMAX)
+    return {
+        'game.ticks_per_s.random': lambda: game_throughput(seed, repeat, lambda: random_controller(seed)),
+        'game.ticks_per_s.ai_depth1': lambda: game_throughput(seed, repeat, lambda: ai_controller)
+    }
+
+
+def run(seed: int, min_time: float, repeat: int, only: str = None) -> dict:
+    """Run every benchmark (or those whose name contains `only`)."""
+    MazeDistances.get()
+    games = seeded_games(seed)
+    states = [model_state(game) for game in games]
+
+    benchmarks = {}
+    benchmarks.update(model_benchmarks(states, min_time, repeat))
+    benchmarks.update(ghost_benchmarks(games, min_time, repeat))
+    benchmarks.update(maze_benchmarks(games, min_time, repeat))
+    benchmarks.update(game_benchmarks(seed, repeat))
+
+    results = {}
+    for name, bench in benchmarks.items():
+        if only != None and only not in name: continue
+        results[name] = bench()
+        print(f'{name:<36}{results[name]["value"]:>14.2f} {results[name]["unit"]}', file=sys.stderr)
+
+    return {
+        'meta': {
+            'seed': seed,
+            'min_time': min_time,
+            'repeat': repeat,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'results': results
+    }
+
+
+def compare(base: dict, new: dict, threshold: float) -> list[str]:
+    """Print how each benchmark in both runs changed; returns the names of
+    those that got worse by more than `threshold` (a fraction)."""
+    regressions = []
+    print(f'{"benchmark":<36}{"base":>12}{"new":>12}{"change":>9}')
+    for name, b in base['results'].items():
+        n = new['results'].get(name)
+        if n == None: continue
+        change = (n['value'] - b['value'])/b['value']
+        worse = -change if b['higher_is_better'] else change
+        flag = ''
+        if worse > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        elif worse < -threshold:
+            flag = '  faster'
+        print(f'{name:<36}{b["value"]:>12.2f}{n["value"]:>12.2f}{change:>+9.1%}{flag}')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', default='bench.json')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--min-time', type=float, default=0.05, help='seconds per timed batch')
+    parser.add_argument('--repeat', type=int, default=5, help='timed batches per benchmark')
+    parser.add_argument('--only', help='run only benchmarks whose name contains this')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help='compare two result files instead of running')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='slowdown that counts as a regression')
+    args = parser.parse_args(argv)
+
+    if args.compare != None:
+        with open(args.compare[0]) as f: base = json.load(f)
+        with open(args.compare[1]) as f: new = json.load(f)
+        regressions = compare(base, new, args.threshold)
+        if regressions:
+            print(f'{len(regressions)} regression(s) over {args.threshold:.0%}', file=sys.stderr)
+            sys.exit(1)
+        return
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy') # Maze.draw runs offscreen
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    result = run(args.seed, args.min_time, args.repeat, args.only)
+    with open(args.out, 'w') as f:
+        json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
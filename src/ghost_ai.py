@@ -1,7 +1,8 @@
 from enum import Enum
 import random
 
-from vector import Vector
+from sim.maze_state import MazeState
+from util import tile_dist_sq
 
 class GhostMode(Enum):
     SCATTER = 1
@@ -44,58 +45,102 @@ def get_target_tile_inky(
 	player_tile: tuple[int, int],
 	blinky_tile: tuple[int, int]
 ):
+	# pivot + (pivot - blinky); the y flip this once attempted never took effect
 	pivot = player_tile
-	vec_diff = Vector(*pivot) - Vector(*blinky_tile)
-	vec_diff.setidx(1, vec_diff.y*-1)
-	return (pivot[0] + vec_diff.x, pivot[1] + vec_diff.y)
+	return (2*pivot[0] - blinky_tile[0], 2*pivot[1] - blinky_tile[1])
 
 def get_target_tile_clyde(
 	player_tile: tuple[int, int],
 	clyde_tile: tuple[int, int],
 	scatter_target_tile: tuple[int, int]
 ):
-	d = Vector.distance_squared(Vector(*clyde_tile), Vector(*player_tile))
+	d = tile_dist_sq(clyde_tile, player_tile)
 	if d < 64:
 		return scatter_target_tile
 	else:
 		return player_tile
 
+HOUSE_MODES = (GhostMode.GHOST_HOUSE_JOINING, GhostMode.GHOST_HOUSE_LEAVING)
+"""Modes in which a ghost may pass through the ghost house door."""
+
+def build_exit_tables(layout: str = MazeState.FRESH_MAZE):
+	"""
+	Ghost exits for every tile of `layout`, precomputed since walls, doors
+	and portals never change.
+
+	Returns (`exits`, `reverse`): `exits[tile][facing][door]` is a tuple of
+	the tiles a ghost facing `facing` may step to, in 'up', 'left', 'down',
+	'right' order, never reversing; `door` is whether it may use the ghost
+	house door. `reverse[tile][facing]` is the tile behind it.
+	"""
+	exits, reverse = {}, {}
+	for y in range(MazeState.HEIGHT):
+		for x in range(MazeState.WIDTH):
+			tile = (x, y)
+			exits[tile], reverse[tile] = {}, {}
+			for facing in DIR_VECTOR:
+				back = DIR_VECTOR[OPPOSITE_DIR[facing]]
+				reverse[tile][facing] = (x+back[0], y+back[1])
+				by_door = []
+				for door in (False, True):
+					tiles = []
+					for dir in ['up', 'left', 'down', 'right']:
+						if dir == OPPOSITE_DIR[facing]: continue
+						vec = DIR_VECTOR[dir]
+						nx, ny = x+vec[0], y+vec[1]
+						if nx < 0 or nx >= MazeState.WIDTH or ny < 0 or ny >= MazeState.HEIGHT:
+							continue
+						state = int(layout[nx + MazeState.WIDTH*ny])
+						if state in [0, 6, 7] or (not door and state == 4):
+							# skip non-traversable, and outside the ghost
+							# house modes, the ghost house entrance.
+							continue
+						tiles.append((nx, ny))
+					by_door.append(tuple(tiles))
+				exits[tile][facing] = tuple(by_door)
+	return exits, reverse
+
+GHOST_EXITS, GHOST_REVERSE = build_exit_tables()
+"""See `build_exit_tables`."""
+
+def get_ghost_exits(
+	from_tile: tuple[int, int],
+	facing: str,
+	cur_mode: GhostMode = GhostMode.CHASE
+) -> tuple[tuple[int, int], ...]:
+	"""Tiles a ghost may step to next; the tile behind it only if cornered."""
+	exits = GHOST_EXITS[from_tile][facing][cur_mode in HOUSE_MODES]
+	if len(exits) == 0:
+		return (GHOST_REVERSE[from_tile][facing],)
+	return exits
+
 def get_next_move_tile(
 	from_tile: tuple[int, int],
 	target_tile: tuple[int, int],
-	maze,
 	facing: str,
-	cur_mode: GhostMode = GhostMode.CHASE
+	cur_mode: GhostMode = GhostMode.CHASE,
+	rng: random.Random = random
 ):
-	candidate_dirs = ['up', 'left', 'down', 'right']
-	opposite_dir = OPPOSITE_DIR[facing]
-	opposite_tile =\
-		(from_tile[0]+DIR_VECTOR[opposite_dir][0], from_tile[1]+DIR_VECTOR[opposite_dir][1])
-	candidate_dirs.remove(opposite_dir)
-	candidate_tiles = {}
-	dist = {}
-
-	# wall check
-	for dir in candidate_dirs:
-		vec = DIR_VECTOR[dir]
-		check_tile = (from_tile[0]+vec[0], from_tile[1]+vec[1])
-		state = maze.get_tile_state(Vector(check_tile[0], check_tile[1]))
-		if state in [0, -1, 6, 7] or \
-			(cur_mode not in [GhostMode.GHOST_HOUSE_JOINING, GhostMode.GHOST_HOUSE_LEAVING] and state == 4):
-			# skip non-traversable, and if not in eaten
-			# state, skip ghost house entrance.
-			continue
-		candidate_tiles[dir] = check_tile
-		dist[dir] = Vector.distance_squared(Vector(*check_tile), Vector(*target_tile))
-	
-	if len(candidate_tiles) > 0:
-		if cur_mode == GhostMode.FRIGHTENED:
-			# frightened; pick random tile
-			chosen_dir = random.choice(list(candidate_tiles.keys()))
-		else:
-			# go towards target
-			chosen_dir = min(dist, key=dist.get)
-	else:
-		chosen_dir = opposite_dir
+	"""
+	The tile a ghost steps to from `from_tile`: the exit closest to
+	`target_tile` (earliest of 'up', 'left', 'down', 'right' on ties), or
+	one picked with `rng` when frightened. Looked up in `GHOST_EXITS`.
+	"""
+	exits = GHOST_EXITS[from_tile][facing][cur_mode in HOUSE_MODES]
+	if len(exits) == 0:
+		return GHOST_REVERSE[from_tile][facing]
+
+	if cur_mode == GhostMode.FRIGHTENED:
+		# frightened; pick random tile
+		return rng.choice(exits)
+	if len(exits) == 1:
+		return exits[0]
 
-	return candidate_tiles[chosen_dir] if chosen_dir != opposite_dir else opposite_tile
\ No newline at end of file
+	# go towards target
+	tx, ty = target_tile
+	best, best_dist = None, None
+	for tile in exits:
+		dist = (tile[0]-tx)*(tile[0]-tx) + (tile[1]-ty)*(tile[1]-ty)
+		if best_dist == None or dist < best_dist:
+			best, best_dist = tile, dist
+	return best
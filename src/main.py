@@ -1,8 +1,25 @@
+import argparse
+import sys
+
 from application import Application
+import profiler
     
 def main():
-    g = Application()
-    g.run()
+    parser = argparse.ArgumentParser(description='Pac Man with a minimax AI.')
+    parser.add_argument('--profile', metavar='TRACE_JSON', help='time each frame\'s phases; on exit, '
+        'print rolling percentiles and write a Chrome trace (chrome://tracing) here')
+    parser.add_argument('--seed', type=int, help='play every game with this seed (ghosts and AI tie-breaks)')
+    args = parser.parse_args()
+
+    if args.profile != None:
+        profiler.enable()
+    g = Application(seed=args.seed)
+    try:
+        g.run()
+    finally:
+        if profiler.active != None:
+            print(profiler.active.report(), file=sys.stderr)
+            profiler.active.write_trace(args.profile)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
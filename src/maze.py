@@ -1,58 +1,26 @@
 
-import math
 import numpy
 import pygame as pg
 from pygame import Surface
 from pygame.sprite import Sprite
 
 from timer import Timer
+import assets
 from util import clip
 
 import application as app
 from vector import Vector
-import ghost as gh
+from sim.maze_state import MazeState
 
 class Maze(Sprite):
 
-    FRESH_MAZE = (
-        '0000000000000000000000000000'
-        '0222222222222002222222222220'
-        '0200002000002002000002000020'
-        '0300002000002002000002000030'
-        '0200002000002002000002000020'
-        '0222222222222222222222222220'
-        '0200002002000000002002000020'
-        '0200002002000000002002000020'
-        '0222222002222002222002222220'
-        '0000002000001001000002000000'
-        '0000002000001001000002000000'
-        '0000002001111111111002000000'
-        '0000002001000440001002000000'
-        '0000002001011111101002000000'
-        '1611112111011111101112111171'
-        '0000002001011111101002000000'
-        '0000002001000000001002000000'
-        '0000002001111151111002000000'
-        '0000002001000000001002000000'
-        '0000002001000000001002000000'
-        '0222222222222002222222222220'
-        '0200002000002002000002000020'
-        '0200002000002002000002000020'
-        '0322002222222112222222002230'
-        '0002002002000000002002002000'
-        '0002002002000000002002002000'
-        '0222222002222002222002222220'
-        '0200000000002002000000000020'
-        '0200000000002002000000000020'
-        '0222222222222222222222222220'
-        '0000000000000000000000000000'
-    )
-
-    WIDTH, HEIGHT = 28, 31
+    FRESH_MAZE = MazeState.FRESH_MAZE
+
+    WIDTH, HEIGHT = MazeState.WIDTH, MazeState.HEIGHT
     TILE_SIZE = 24 # 24x24px square
-    PORTAL_A_TILE = (1, 14)
-    PORTAL_B_TILE = (26, 14)
-    NUM_PELLETS = 244
+    PORTAL_A_TILE = MazeState.PORTAL_A_TILE
+    PORTAL_B_TILE = MazeState.PORTAL_B_TILE
+    NUM_PELLETS = MazeState.NUM_PELLETS
 
     @staticmethod
     def pixel2tile(px_vec: Vector):
@@ -70,22 +38,21 @@ class Maze(Sprite):
         return tile_vec*Maze.TILE_SIZE + Vector(12, 12)
 
     @staticmethod
-    def tile2strpos(tile_vec: Vector):
-        """Converts a tile vector into its position in the maze string."""
-        x, y = math.floor(tile_vec.x), math.floor(tile_vec.y)
-        return x + Maze.WIDTH*y
+    def tile_center_px(x: float, y: float) -> tuple[float, float]:
+        """`tile2pixelctr` for plain coordinates, returned as a tuple."""
+        return (x*Maze.TILE_SIZE + 12, y*Maze.TILE_SIZE + 12)
+
+    tile2strpos = staticmethod(MazeState.tile2strpos)
         
-    def __init__(self, play):
+    def __init__(self, state: MazeState, play):
         self.play = play
+        self.state = state
+        """The maze being drawn; the simulation owns it."""
         self.surface: Surface = play.screen
-        self.maze = list(Maze.FRESH_MAZE)
-        self.image = pg.image.load(app.Application.PROJECT_DIR + '/resources/sprites/maze.png')
+        self.image = assets.sprite('maze')
         self.rect = self.image.get_rect()
         self.rect.topleft = numpy.subtract(self.surface.get_rect().center, self.rect.center)
 
-        self.remaining_pellets = Maze.NUM_PELLETS
-        """Pellets left to eat before moving to the next level."""
-
         # edible sprites
         self.debug_tile = pg.surface.Surface(size=(20, 20))
         self.debug_tile.fill((34, 34, 34))
@@ -93,130 +60,131 @@ class Maze(Sprite):
         self.food_pellet = pg.surface.Surface(size=(6, 6))
         self.food_pellet.fill((255, 183, 174))
         power_sprites = [
-            pg.image.load(app.Application.PROJECT_DIR + '/resources/sprites/power_food.png'),
+            assets.sprite('power_food'),
             pg.surface.Surface(size=(48, 48))
         ]
         power_sprites[1].set_alpha(0)
         self.power_pellet = Timer(frames=power_sprites, wait=10*1000*app.Application.FRAME_TIME)
 
         self.bonus_fruit_sprite = {
-            'bonus_fruit': pg.image.load(f"{app.Application.PROJECT_DIR}/resources/sprites/special_food.png"),
+            'bonus_fruit': assets.sprite('special_food'),
         }
 
         self.portal_sprites = {
-            'portal_a': pg.image.load(f"{app.Application.PROJECT_DIR}/resources/sprites/in_blue_portal.png"),
-            'portal_b': pg.image.load(f"{app.Application.PROJECT_DIR}/resources/sprites/out_orange_portal.png")
+            'portal_a': assets.sprite('in_blue_portal'),
+            'portal_b': assets.sprite('out_orange_portal')
         }
+
+        self.pellet_layer: Surface = None
+        """The walls with every pellet, fruit and portal still in play drawn
+        on; power pellets blink, so they are drawn every frame instead."""
+        self.layer_maze: list[str] = None
+        """`state.maze` as drawn on `pellet_layer`."""
+        self.layer_revision = -1
+        self.power_tiles: list[tuple[int, int]] = []
+        self.shown: Surface = None
+        """Maze background on screen right now (`pellet_layer` or the bare walls)."""
+        self.build_layer()
     
+    @property
+    def maze(self) -> list[str]:
+        return self.state.maze
+
+    @property
+    def remaining_pellets(self) -> int:
+        """Pellets left to eat before moving to the next level."""
+        return self.state.remaining_pellets
+
     def get_tile_state(self, tile_vec: Vector):
-        """Returns the state of a tile.
-
-        Possible return values:
-        -1: out of bounds
-        0: wall (non-traversable)
-        1: empty
-        2: food pellet
-        3: power pellet
-        4: ghost house entrance
-        5: bonus fruit
-        6: portal a
-        7: portal b
-        
-        - dot_food_points = 10
-        - power_pellet_points = 50
-        - bonus_fruit = 100
-        - ghost_points = 200 """
-        
-        if ((tile_vec.x < 0 or tile_vec.x >= Maze.WIDTH) or\
-            (tile_vec.y < 0 or tile_vec.y >= Maze.HEIGHT)):
-            return -1
-        strpos = Maze.tile2strpos(tile_vec)
-        return int(self.maze[strpos])
-    
-    def consume_tile(self, tile: tuple[int, int]):
-        """Change tile state at `tile_vec`, set other game states."""
-        vec = Vector(*tile)
-        state = self.get_tile_state(vec)
-        strpos = Maze.tile2strpos(vec)
-
-        if state in [-1, 0]: # (eating inaccessible tile)
-            pass
-        elif state == 1: # blank tile
-            self.play.sound.stop_chomping()
-        elif state == 2: # food pellet
-            self.maze[strpos] = '1'
-            self.play.sound.start_chomping()
-            self.remaining_pellets -= 1
-            self.play.scoreboard.increment_points_dot()
-            # TODO: change score, counters
-        elif state == 3: # power pellet
-            self.maze[strpos] = '1'
-            self.play.set_ghosts_mode(gh.GhostMode.FRIGHTENED)
-            self.play.play_state.power_pellet_eatened()
-            self.play.sound.music_power_pellet()
-            self.remaining_pellets -= 1
-            self.play.scoreboard.increment_points_power_pellet()
-            # TODO: change score, counters, flee state
-        elif state == 5: # bonus fruit 
-            self.maze[strpos] = '1'
-            self.play.scoreboard.increment_points_fruit()
-            self.play.sound.music_eat_fruit()
-        elif state == 6: # portal a
-            self.play.player.teleport(Maze.PORTAL_B_TILE)
-        elif state == 7: # portal b
-            self.play.player.teleport(Maze.PORTAL_A_TILE)
-
-    def reset(self):
-        self.maze = list(Maze.FRESH_MAZE)
-        self.remaining_pellets = 244
+        """Refer to `MazeState.get_tile_state`"""
+        return self.state.get_tile_state(tile_vec)
     
     def blit_relative(self, surface: Surface, rect: pg.Rect):
         r = rect.copy()
         r.center = (rect.center[0] + self.rect.left, rect.center[1] + self.rect.top)
-        self.surface.blit(surface, r)
+        self.play.mark_drawn(self.surface.blit(surface, r))
+
+    def tile_sprite(self, state: int) -> Surface:
+        """Sprite drawn on a tile in `state` that never animates, or None."""
+        if state == 2: return self.food_pellet
+        if state == 5: return self.bonus_fruit_sprite['bonus_fruit']
+        if state == 6: return self.portal_sprites['portal_a']
+        if state == 7: return self.portal_sprites['portal_b']
+        return None
+
+    def build_layer(self):
+        """Redraw `pellet_layer` from scratch: the walls plus every static tile."""
+        self.pellet_layer = Surface(self.image.get_size()) # opaque, like the screen under it
+        self.pellet_layer.blit(self.image, (0, 0))
+        self.power_tiles = []
+        for y in range(Maze.HEIGHT):
+            for x in range(Maze.WIDTH):
+                state = self.state.tile_state(x, y)
+                if state == 3:
+                    self.power_tiles.append((x, y))
+                    continue
+                img = self.tile_sprite(state)
+                if img == None: continue
+                rect = img.get_rect()
+                rect.center = Maze.tile_center_px(x, y)
+                self.pellet_layer.blit(img, rect)
+        self.layer_maze = list(self.state.maze)
+        self.layer_revision = self.state.revision
+
+    def update_layer(self) -> bool:
+        """Bring `pellet_layer` up to date with the maze. Eaten pellets are erased in
+        place; anything else rebuilds the layer. Returns True if rebuilt."""
+        if self.layer_revision == self.state.revision: return False
+
+        maze = self.state.maze
+        changed = [i for i, (a, b) in enumerate(zip(self.layer_maze, maze)) if a != b]
+        if any(self.layer_maze[i] not in '23' or maze[i] != '1' for i in changed):
+            self.build_layer()
+            return True
+
+        for i in changed:
+            x, y = i % Maze.WIDTH, i // Maze.WIDTH
+            if self.layer_maze[i] == '3':
+                self.power_tiles.remove((x, y)) # never on the layer
+            else:
+                rect = self.food_pellet.get_rect()
+                rect.center = Maze.tile_center_px(x, y)
+                self.pellet_layer.fill((0, 0, 0), rect)
+                self.pellet_layer.blit(self.image, rect, area=rect)
+                if self.shown is self.pellet_layer:
+                    screen_rect = rect.move(self.rect.topleft)
+                    self.surface.blit(self.pellet_layer, screen_rect, area=rect)
+                    self.play.mark_changed(screen_rect)
+            self.layer_maze[i] = maze[i]
+        self.layer_revision = self.state.revision
+        return False
+
+    def restore(self, rect: pg.Rect):
+        """Paint what was shown behind `rect` (in screen space) last frame."""
+        if self.shown == None: return
+        r = rect.clip(self.rect)
+        if r.width and r.height:
+            self.surface.blit(self.shown, r, area=r.move(-self.rect.left, -self.rect.top))
 
     def draw(self, draw_tiles = True):
-        """Draw maze walls, as well as remaining consumables in play."""
-        self.surface.blit(self.image, self.rect)
+        """Draw maze walls, as well as remaining consumables in play.
+
+        Walls and static tiles come from the cached `pellet_layer`, which is only
+        blitted to the screen when it changes; the rest of the frame's
+        sprites are erased with `restore` before being drawn again."""
+        rebuilt = draw_tiles and self.update_layer()
+        background = self.pellet_layer if draw_tiles else self.image
+        if rebuilt or background is not self.shown:
+            self.shown = background
+            self.surface.blit(background, self.rect)
+            self.play.mark_changed(self.rect)
         if not draw_tiles: return
-        
-        for y in range(Maze.HEIGHT):
-            for x in range(Maze.WIDTH):
-                state = self.get_tile_state(Vector(x, y))
-                # if state in [0, 1, 4]: continue # skip non-consumables
-                # if state in [1, 4]: continue # ---DEBUG---
-
-                tile_ctr = Maze.tile2pixelctr(Vector(x, y))
-                # if state == 0: # ---DEBUG---
-                #     rect = self.debug_tile.get_rect()
-                #     rect.center = (tile_ctr.x, tile_ctr.y)
-                #     self.blit_relative(self.debug_tile, rect)
-                if state == 2: # food pellet
-                    rect = self.food_pellet.get_rect()
-                    rect.center = (tile_ctr.x, tile_ctr.y)
-                    self.blit_relative(self.food_pellet, rect)
-                elif state == 3:
-                    img:Surface = self.power_pellet.imagerect()
-                    rect = img.get_rect()
-                    rect.center = (tile_ctr.x, tile_ctr.y)
-                    self.blit_relative(img, rect)
-                elif state == 5:
-                    img = self.bonus_fruit_sprite['bonus_fruit']
-                    rect = img.get_rect()
-                    rect.center = (tile_ctr.x, tile_ctr.y)
-                    self.blit_relative(img, rect)
-                elif state == 6:
-                    img = self.portal_sprites['portal_a']
-                    rect = img.get_rect()
-                    rect.center = (tile_ctr.x, tile_ctr.y)
-                    self.blit_relative(img, rect)
-                elif state == 7:
-                    img = self.portal_sprites['portal_b']
-                    rect = img.get_rect()
-                    rect.center = (tile_ctr.x, tile_ctr.y)
-                    self.blit_relative(img, rect)
-                
-                    
+
+        img: Surface = self.power_pellet.imagerect()
+        for tile in self.power_tiles:
+            rect = img.get_rect()
+            rect.center = Maze.tile_center_px(*tile)
+            self.blit_relative(img, rect)
 
     def update(self):
         self.draw()
\ No newline at end of file
@@ -0,0 +1,123 @@
+from collections import deque
+import hashlib
+import os
+import numpy as np
+
+from util import PROJECT_DIR
+from sim.maze_state import MazeState
+
+UNREACHABLE = np.iinfo(np.uint16).max
+"""Stored distance between tiles with no path between them."""
+
+CACHE_VERSION = 1
+"""Bump when the table's layout or the traversal rules below change."""
+
+
+def is_traversable(state: str) -> bool:
+    """Tiles Pac Man and hostile ghosts can both stand on: no walls, and no
+    ghost house door."""
+    return state not in '04'
+
+
+def layout_hash(layout: str) -> str:
+    """Key of a maze layout for the on-disk cache."""
+    h = hashlib.sha1(f'{CACHE_VERSION}:{MazeState.WIDTH}x{MazeState.HEIGHT}:'.encode())
+    h.update(layout.encode())
+    return h.hexdigest()[:16]
+
+
+def build_distance_table(layout: str) -> tuple[np.ndarray, np.ndarray]:
+    """Breadth-first search from every traversable tile of `layout`.
+
+    Returns (`tile_index`, `dist`): `tile_index[strpos]` is the row/column of
+    that tile in `dist` (-1 if not traversable), and `dist[a, b]` is the
+    number of steps between tiles `a` and `b`, or `UNREACHABLE`. The portals
+    are connected to each other, matching Pac Man's teleport."""
+    tile_index = np.full(len(layout), -1, dtype=np.int16)
+    strposes = [i for i, c in enumerate(layout) if is_traversable(c)]
+    for idx, strpos in enumerate(strposes):
+        tile_index[strpos] = idx
+
+    # adjacency lists, by index
+    neighbors = [[] for _ in strposes]
+    for idx, strpos in enumerate(strposes):
+        x, y = strpos % MazeState.WIDTH, strpos // MazeState.WIDTH
+        for dx, dy in [(0, -1), (-1, 0), (0, 1), (1, 0)]:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < MazeState.WIDTH and 0 <= ny < MazeState.HEIGHT:
+                n = tile_index[nx + MazeState.WIDTH*ny]
+                if n >= 0: neighbors[idx].append(int(n))
+    portal_a = int(tile_index[MazeState.PORTAL_A_TILE[0] + MazeState.WIDTH*MazeState.PORTAL_A_TILE[1]])
+    portal_b = int(tile_index[MazeState.PORTAL_B_TILE[0] + MazeState.WIDTH*MazeState.PORTAL_B_TILE[1]])
+    if portal_a >= 0 and portal_b >= 0:
+        neighbors[portal_a].append(portal_b)
+        neighbors[portal_b].append(portal_a)
+
+    dist = np.empty((len(strposes), len(strposes)), dtype=np.uint16)
+    for src in range(len(strposes)):
+        row = [UNREACHABLE]*len(strposes)
+        row[src] = 0
+        queue = deque([src])
+        while queue:
+            cur = queue.popleft()
+            d = row[cur] + 1
+            for n in neighbors[cur]:
+                if row[n] == UNREACHABLE:
+                    row[n] = d
+                    queue.append(n)
+        dist[src] = row
+
+    return tile_index, dist
+
+
+def load_distance_table(layout: str = MazeState.FRESH_MAZE) -> tuple[np.ndarray, np.ndarray]:
+    """`build_distance_table`, cached under `cache/` in the project
+    directory by the layout's hash."""
+    cache_dir = os.path.join(PROJECT_DIR, 'cache')
+    path = os.path.join(cache_dir, f'maze_dist_{layout_hash(layout)}.npz')
+    try:
+        with np.load(path) as f:
+            return f['tile_index'], f['dist']
+    except (OSError, KeyError, ValueError):
+        pass
+
+    tile_index, dist = build_distance_table(layout)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        np.savez(path, tile_index=tile_index, dist=dist)
+    except OSError:
+        pass # read-only checkout; just rebuild next time
+    return tile_index, dist
+
+
+class MazeDistances:
+    """True maze distances between tiles of `MazeState.FRESH_MAZE` in O(1)."""
+    _instance = None
+
+    @classmethod
+    def get(cls):
+        """Process-wide table, loaded on first use."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, layout: str = MazeState.FRESH_MAZE):
+        self.tile_index, self.dist = load_distance_table(layout)
+        self.strposes = np.flatnonzero(self.tile_index >= 0)
+        """strpos of each row/column of `dist`."""
+
+        # plain-list copies; indexing these is much faster than numpy scalars
+        self._index = self.tile_index.tolist()
+        self._rows = self.dist.tolist()
+
+    def distance(self, a: tuple[int, int], b: tuple[int, int]) -> int:
+        """Steps between tiles `a` and `b`, or None if either tile isn't
+        traversable or there's no path."""
+        if not (0 <= a[0] < MazeState.WIDTH and 0 <= a[1] < MazeState.HEIGHT\
+            and 0 <= b[0] < MazeState.WIDTH and 0 <= b[1] < MazeState.HEIGHT):
+            return None
+        ia = self._index[a[0] + MazeState.WIDTH*a[1]]
+        ib = self._index[b[0] + MazeState.WIDTH*b[1]]
+        if ia < 0 or ib < 0: return None
+        d = self._rows[ia][ib]
+        return None if d == UNREACHABLE else d
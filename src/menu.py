@@ -1,6 +1,7 @@
 import pygame as pg
 import sys
 from timer import Timer
+import assets
 from button import Button
 from play import Play
 from scoreboard import Scoreboard
@@ -11,14 +12,14 @@ class Menu():
         self.app = app
         self.screen = app.screen
         self.animation = Timer(
-            frames=[pg.transform.rotozoom(pg.image.load(f'{application.Application.PROJECT_DIR}/pacman_img/tile{n}.png'), 0, 0.7) for n in range(154)],
+            frames=assets.menu_frames(),
             wait=1000/60
         )
         pg.display.set_caption("PACMAN Menu")
         self.scoreboard = Scoreboard(self)
     
     def get_font(self, size):
-        return pg.font.Font("resources/fonts/Press Start 2P.ttf", size)
+        return assets.font(size)
 
     def high_score_screen(self):
         while True:
@@ -56,16 +57,17 @@ class Menu():
 
     def draw_anim_frame(self):
             image = self.animation.imagerect()
+            if image == None: return # still loading
             img_rect = image.get_rect(center=(600, 400))
             self.screen.blit(image, img_rect)
 
     def main_menu(self):
         self.screen.fill((0, 0, 0))
-        img_pacman = pg.image.load(application.Application.PROJECT_DIR + "/pacman_img/pacman.png")
+        img_pacman = assets.image("pacman_img/pacman.png")
         image = pg.transform.scale(img_pacman, (200,200))
         self.img_rect = image.get_rect(center=(575, 110))
 
-        img_pacmanghost = pg.image.load(application.Application.PROJECT_DIR + "/pacman_img/ghostintro.jpg")
+        img_pacmanghost = assets.image("pacman_img/ghostintro.jpg")
         image2 = pg.transform.scale(img_pacmanghost, (260,160))
         self.img2_rect = image2.get_rect(center=(575, 560))
 
@@ -88,7 +90,7 @@ class Menu():
                 if event.type == pg.MOUSEBUTTONDOWN:
                     if self.play_button.checkForInput(self.menu_mouse_pos):
                         pg.display.set_caption("PAC MAN")
-                        p = Play(app=self.app)
+                        p = Play(app=self.app, seed=self.app.seed)
                         p.run()
                         self.scoreboard.load_high_score()
                     if self.high_score_button.checkForInput(self.menu_mouse_pos):
@@ -1,26 +1,51 @@
 ## This class will manage the main game play screen.
+import time
 import pygame as pg
 from pygame.surface import Surface
 
 import game_events as ge
+import profiler
+import assets
 import maze as mz
 import ghost as gh
-from play_state import PlayState
 import player
+import player_ai.player_ai as ai
 from sound import Sound
 import scoreboard as sb
+from sim.replay import ReplayRecorder
+from sim.simulation import Simulation
+from sim.timestep import FixedTimestep
 
 class Play:
-    def __init__(self, app):
+    """The game play screen: draws a `Simulation` and plays its sounds.
+
+    The game ticks at `Simulation.TICKS_PER_SECOND` of game time no matter
+    how often frames are drawn; `time_scale` speeds it up (to at most
+    `FixedTimestep.MAX_TIME_SCALE`) or slows it down against the wall clock.
+    `seed` replays a game (see `Simulation`)."""
+
+    RECORD_REPLAYS = True
+    """Save a replay of every finished game to `sim.replay.REPLAY_DIR`."""
+
+    def __init__(self, app, time_scale: float = 1.0, seed: int = None):
         self.app = app
         self.screen:Surface = app.screen
+        self.game = Simulation(seed=seed)
+        self.play_state = self.game.play_state
+        self.recorder = ReplayRecorder(self.game) if Play.RECORD_REPLAYS else None
+        self.timestep = FixedTimestep(Simulation.TICK_TIME, time_scale)
+
+        self.drawn_rects: list[pg.Rect] = []
+        """Screen areas drawn over the background this frame; erased next frame."""
+        self.last_drawn_rects: list[pg.Rect] = []
+        self.changed_rects: list[pg.Rect] = []
+        """Background areas that changed this frame."""
         self.scoreboard = sb.Scoreboard(play=self)
-        self.maze = mz.Maze(play=self)
-        self.play_state = PlayState(play=self)
+        self.maze = mz.Maze(state=self.game.maze, play=self)
 
         self.sound = Sound()
 
-        self.font = pg.font.Font(f'{app.PROJECT_DIR}/resources/fonts/Press Start 2P.ttf', 24)
+        self.font = assets.font(24)
         
         self.ready_text = self.font.render("READY!", True, (255, 255, 0))
         self.ready_text_rect = self.ready_text.get_rect()
@@ -34,74 +59,101 @@ class Play:
         self.game_over_text_rect = self.ready_text.get_rect()
         self.game_over_text_rect.center = (24*12.5, 24*6)
 
-        self.player_speed = 7
-        """The player's movement speed, in tiles per second."""
-
-        self.ghosts_speed = 7
-        """The ghosts' movement speed, in tiles per second."""
+        self.player = player.Player(state=self.game.player, maze=self.maze, play=self)
+        self.player.attach_ai(self.game, self.timestep.time_scale)
 
-        self.player = player.Player(maze=self.maze, play=self)
+        self.overlay_font = assets.font(12)
+        self.overlay_source: dict = None
+        """`ai.stats.last` the overlay was rendered from."""
+        self.overlay_images: list[Surface] = []
 
         self.ghosts = pg.sprite.Group(
-            gh.Blinky(maze=self.maze, pacman=self.player, play=self),
-            gh.Inky(maze=self.maze, pacman=self.player, play=self),
-            gh.Pinky(maze=self.maze, pacman=self.player, play=self),
-            gh.Clyde(maze=self.maze, pacman=self.player, play=self)
+            gh.Blinky(state=self.game.ghost('Blinky'), maze=self.maze, play=self),
+            gh.Inky(state=self.game.ghost('Inky'), maze=self.maze, play=self),
+            gh.Pinky(state=self.game.ghost('Pinky'), maze=self.maze, play=self),
+            gh.Clyde(state=self.game.ghost('Clyde'), maze=self.maze, play=self)
         )
 
-        self.phase = 0
-        """The phase of the game.
-        
-        0: New game
-        1: Ready
-        2: Player-controlled gameplay
-        3: Finished game
-        4: game over"""
-
-    def set_ghosts_mode(self, mode):
-        for g in self.ghosts:
-            g.set_mode(mode)
-
-    def collision_check(self):
-        cols = pg.sprite.spritecollide(self.player, self.ghosts, False)
-        if len(cols) > 0:
-            g = cols[0]
-            self.player.ghost_interact(g)
-    
-    def reset(self, new_round = False):
-        if self.player.lives > 0:
-            self.play_state.reset()
-            self.player.reset()
-            for g in self.ghosts:
-                g.reset()
-
-            if new_round: self.maze.reset()
-
-            self.play_state.action_pause(120)
-            self.phase = 1
-        else:
-            # GAME OVER
-            self.scoreboard.save_high_score()
-            self.play_state.action_pause(300)
-            self.phase = 5
-            pass
+    def handle_events(self):
+        """Play the simulation's queued sound cues and keep the score current."""
+        self.scoreboard.set_score(self.game.score)
+        for ev in self.game.pop_events():
+            if ev == 'game_over':
+                self.scoreboard.save_high_score()
+            else:
+                getattr(self.sound, ev)()
+
+    def draw_ai_overlay(self):
+        """The AI's latest decision, left of the maze (see `Player.AI_STATS_OVERLAY`)."""
+        stats = ai.stats
+        if not player.Player.AI_STATS_OVERLAY or stats == None: return
+        last = stats.last
+        if last == None: return
+        if last is not self.overlay_source:
+            self.overlay_source = last
+            p95 = stats.decision_ms.percentile(95)
+            lines = [
+                f'depth {last["depth"]}',
+                f'time {last["ms"]:.1f}ms',
+                f'nodes {last["nodes"]}',
+                f'leaves {last["leaves"]}',
+                f'prunes {last["prunes"]}',
+                f'tt {last["tt_hits"]}/{last["tt_probes"]}',
+                f'p95 {p95:g}ms' if p95 != float('inf') else f'p95 >{stats.decision_ms.edges[-1]:g}ms'
+            ]
+            self.overlay_images = [self.overlay_font.render(line, True, (160, 160, 160)) for line in lines]
+        for i, img in enumerate(self.overlay_images):
+            self.mark_drawn(self.screen.blit(img, (16, 40 + 20*i)))
+
+    def mark_drawn(self, rect: pg.Rect):
+        """Note a sprite drawn at `rect` this frame."""
+        self.drawn_rects.append(rect)
+
+    def mark_changed(self, rect: pg.Rect):
+        """Note a change to the background at `rect` this frame."""
+        self.changed_rects.append(rect)
+
+    def erase_sprites(self):
+        """Paint the background back over last frame's sprites."""
+        for r in self.last_drawn_rects:
+            self.screen.fill((0, 0, 0), r)
+            self.maze.restore(r)
+
+    def present(self):
+        """Wait for the next frame, updating only the parts of the screen
+        that were erased or drawn this frame."""
+        rects = self.last_drawn_rects + self.drawn_rects + self.changed_rects
+        self.last_drawn_rects = self.drawn_rects
+        self.drawn_rects = []
+        self.changed_rects = []
+        self.app.wait_next_frame(rects)
 
     def run(self):
-        self.play_state.action_pause(150)
-        self.sound.music_beginning()
+        self.game.start()
+        self.screen.fill((0, 0, 0))
+        self.mark_changed(self.screen.get_rect())
+        last = time.perf_counter()
         while True:
-            self.screen.fill((0, 0, 0))
+            profiler.begin_frame()
             ge.process_events(self)
-            self.play_state.update()
-
-            if self.phase == 0:
-                self.scoreboard.update()
+            profiler.lap('process_events')
+            now = time.perf_counter()
+            for _ in range(self.timestep.advance(now - last)):
+                self.game.tick()
+            last = now
+            profiler.lap('tick')
+            self.handle_events()
+            profiler.lap('handle_events')
+            phase = self.game.phase
+            if phase != 3:
+                self.erase_sprites()
+                profiler.lap('erase')
+
+            if phase == 0:
+                self.scoreboard.draw()
                 self.maze.draw(draw_tiles=False)
                 self.maze.blit_relative(self.ready_text, self.ready_text_rect)
-                if not self.play_state.is_action_pausing:
-                    self.phase = 1
-                    self.play_state.action_pause(100)
-            elif self.phase == 1:
+            elif phase == 1:
                 # waiting to move on from ready to gameplay
                 self.scoreboard.draw()
                 self.maze.draw()
@@ -109,53 +161,40 @@ class Play:
                 self.player.draw()
                 for g in self.ghosts:
                     g.draw()
-                if not self.play_state.is_action_pausing:
-                    # transition to gameplay phase
-                    self.sound.music_normal()
-                    self.phase = 2
-            elif self.phase == 2:
-                if self.maze.remaining_pellets <= 0:
-                    self.play_state.action_pause(120)
-                    self.sound.stop_all()
-                    self.phase = 3
-                    continue
-                if not self.play_state.is_action_pausing:
-                    self.player.update()
-                    self.ghosts.update()
-                    self.collision_check()
-
-                self.maze.draw()
-                for g in self.ghosts:
-                    g.draw()
-                self.player.draw()
-                self.scoreboard.update()
-            elif self.phase == 3:
-                # maze cleared, action pause
+            elif phase == 2:
                 self.maze.draw()
+                profiler.lap('maze.draw')
                 for g in self.ghosts:
                     g.draw()
+                profiler.lap('ghosts.draw')
                 self.player.draw()
-                if not self.play_state.is_action_pausing:
-                    self.phase = 4
-                    self.play_state.action_pause(240)
+                profiler.lap('player.draw')
+                self.scoreboard.draw()
+                profiler.lap('scoreboard.draw')
+                self.draw_ai_overlay()
+            elif phase == 3:
+                # maze cleared, action pause; fast-forwarded without presenting frames
+                self.game.tick()
+                last = time.perf_counter()
                 continue
-            elif self.phase == 4:
+            elif phase == 4:
                 # clear message, action pause
                 self.scoreboard.draw()
                 self.maze.draw(draw_tiles=False)
                 self.maze.blit_relative(self.clear_text, self.clear_text_rect)
                 self.player.draw()
-                if not self.play_state.is_action_pausing:
-                    self.play_state.level += 1
-                    self.reset(new_round=True)
-            elif self.phase == 5:
+            elif phase == 5:
                 # game over
                 self.scoreboard.draw()
                 self.maze.draw()
                 for g in self.ghosts: g.draw()
                 self.maze.blit_relative(self.game_over_text, self.game_over_text_rect)
-                if not self.play_state.is_action_pausing:
+                if self.game.over:
+                    self.player.stop_ai()
+                    if self.recorder != None: self.recorder.save()
                     self.screen.fill((0, 0, 0))
                     return
 
-            self.app.wait_next_frame()
\ No newline at end of file
+            profiler.lap('draw')
+            self.present()
+            profiler.end_frame()
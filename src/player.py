@@ -1,43 +1,53 @@
-import random
 import pygame as pg
 from pygame.sprite import Sprite
 
-from vector import Vector
 
-from util import *
-from timer import Timer, TimerDict, TimerDual
+from timer import Timer, TimerDict
+import assets
 import maze as mz
-import application as app
-import ghost as gh
 import player_ai.player_ai as ai
+from player_ai.think_ahead import ThinkAhead
+from sim.actors import PlayerState
  
 class Player(Sprite):
-    """Class for the Player, handling Pac Man's controls, movement, and other operations."""
-    DIR_VECTOR = {
-        'up': (0, -1),
-        'left': (-1, 0),
-        'down': (0, 1),
-        'right': (1, 0)
-    }
+    """Draws Pac Man and forwards controls to his `PlayerState`."""
 
-    SPAWN_TILE = (12, 17)
+    AI_RESERVE_MS = 4
+    """Frame time kept back from the AI for drawing the rest of the frame."""
 
-    def __init__(self, maze: mz.Maze, play):
+    AI_MIN_BUDGET_MS = 1
+    """Smallest AI budget per decision, even if the frame is already late."""
+
+    AI_WORKERS = 1
+    """Processes searching root moves side by side (see `player_ai.parallel`);
+    1 searches in the game's own process. Pac Man never has more than 4
+    moves, so more than 4 doesn't help."""
+
+    AI_THINK_AHEAD = True
+    """Decide each turn on a background thread while Pac Man walks there
+    (see `ThinkAhead`), instead of on the frame he arrives."""
+
+    AI_STATS_OVERLAY = False
+    """Collect search statistics and show the latest decision's on screen."""
+
+    def __init__(self, state: PlayerState, maze: mz.Maze, play):
         super().__init__()
+        self.state = state
+        """Pac Man in the simulation; this sprite only draws him."""
         self.maze = maze
         self.play = play
         self.rect = pg.Rect((0, 0), (mz.Maze.TILE_SIZE/2, mz.Maze.TILE_SIZE/2))
 
         player_sprites = {
-            'up': [pg.image.load(f"{app.Application.PROJECT_DIR}/resources/sprites/pacs_up_{x}.png") for x in [1, 2, 1]],
-            'down': [pg.image.load(f"{app.Application.PROJECT_DIR}/resources/sprites/pacs_down_{x}.png") for x in [1, 2, 1]],
-            'left': [pg.image.load(f"{app.Application.PROJECT_DIR}/resources/sprites/pacs_left_{x}.png") for x in [1, 2, 1]],
-            'right': [pg.image.load(f"{app.Application.PROJECT_DIR}/resources/sprites/pacs_right_{x}.png") for x in [1, 2, 1]]
+            'up': [assets.sprite(f"pacs_up_{x}") for x in [1, 2, 1]],
+            'down': [assets.sprite(f"pacs_down_{x}") for x in [1, 2, 1]],
+            'left': [assets.sprite(f"pacs_left_{x}") for x in [1, 2, 1]],
+            'right': [assets.sprite(f"pacs_right_{x}") for x in [1, 2, 1]]
         }
 
-        self.font = pg.font.Font(f'{app.Application.PROJECT_DIR}/resources/fonts/Press Start 2P.ttf', 24)
+        self.font = assets.font(24)
 
-        player_all_closed_sprite = pg.image.load(f"{app.Application.PROJECT_DIR}/resources/sprites/pacs_all_closed.png")
+        player_all_closed_sprite = assets.sprite('pacs_all_closed')
 
         for v in player_sprites.values():
             v.insert(0, player_all_closed_sprite)
@@ -45,160 +55,74 @@ class Player(Sprite):
         self.pacman_animator = TimerDict(dict_frames=player_sprites, first_key='up', wait=48)
         """The sprite animation handler."""
 
-        death_sprites = [pg.image.load(f"{app.Application.PROJECT_DIR}/resources/sprites/dead_pacs_{x}.png") for x in range(1, 12)]
+        death_sprites = [assets.sprite(f"dead_pacs_{x}") for x in range(1, 12)]
         self.death_animator = Timer(death_sprites, looponce=True)
 
         """Sprite animation handler for Pac Man's death animation."""
 
-        self.lives = 3
-        """The player's remaining lives."""
-
-        self.tile = (12, 17)
-        """The player's last \"steady\" tile."""
-
-        self.tile_next = (13, 17)
-        """The immediate tile for the player to move towards. Should be adjacent to `self.tile`."""
-
-        self.tile_progress = 0
-        """Player's progress of movement between `self.tile`` and `self.next_tile`.
-        Should range 0 to 1 inclusive."""
-
-        self.eaten_ghost = None
-        """Ghost being eaten."""
-
-        self.hit = False
-
-        self.death_phase = -1
-        """Phase of Pac Man's death.
-        
-        -1: alive
-        0: just got hit; action pause w/ pac man and ghosts visible
-        1: action pause w/ just pac man visible
-        2: animation running
-        3: finally dead"""
-
-        self.facing = ''
-        self.update_facing()
-        self.maze.consume_tile(self.tile)
-
-    def ghost_interact(self, ghost: gh.Ghost):
-        # eaten; do nothing
-        if ghost.mode in [gh.GhostMode.EATEN, gh.GhostMode.EATEN_INVISIBLE]: return
-
-        if ghost.mode == gh.GhostMode.FRIGHTENED: # frightened
-            ghost.mode = gh.GhostMode.EATEN_INVISIBLE
-            self.play.play_state.action_pause(50)
-            self.play.sound.eat_ghost()
-            self.play.scoreboard.increment_points_ghost()
-            # TODO: replace pacman's sprite with score text
-        else: # hostile in all its forms
-            self.got_hit()
-        
-        self.play.sound.stop_chomping()
-
-    def got_hit(self):
-        """When Pac Man is hit by a ghost."""
-        self.hit = True
-
-    def update_facing(self):
-        """Update `self.facing` based on `self.tile` and `self.tile_next`."""
-        diff = (self.tile_next[0] - self.tile[0], self.tile_next[1] - self.tile[1])
-        if diff == (0,0): return
-        if diff[0] != 0: # horizontal movement
-            self.facing = 'left' if diff[0] < 0 else 'right'
-        else: # vertical movement
-            self.facing = 'down' if diff[1] > 0 else 'up'
-        
-    def teleport(self, tile: tuple[int, int]):
-        """Teleport Pac Man to a particular tile."""
-        self.tile = tile
-        self.tile_next = tile
-        self.tile_next = self.get_facing_tile()
-        self.tile_progress = 0
-    
-    def reset(self):
-        """Runs after death animation is finished."""
-        self.tile = Player.SPAWN_TILE
-        self.tile_next = Player.SPAWN_TILE
-        self.tile_progress = 0
-        self.facing = 'right'
-        self.update_tile_next()
-        self.hit = False
-        self.death_phase = -1
-        self.death_animator.reset()
-        self.pacman_animator.reset()
-        pass
-
-    def get_facing_tile(self, direction:str=None):
-        if direction == None:
-            vec = Player.DIR_VECTOR[self.facing]
+        self.drawn_death_phase = -1
+        """`state.death_phase` as of the last `draw`."""
+
+        self.think_ahead: ThinkAhead = None
+
+        self.time_scale = 1.0
+        """Game seconds per wall-clock second; see `attach_ai`."""
+
+    def attach_ai(self, game, time_scale: float = 1.0):
+        """Let the AI steer Pac Man in `game`, which plays `time_scale` times
+        faster than real time (see `Play`), searching with
+        `SearchMode.TT_MINIMAX`."""
+        self.time_scale = time_scale
+        if Player.AI_STATS_OVERLAY:
+            ai.enable_stats()
+        if Player.AI_THINK_AHEAD:
+            self.think_ahead = ThinkAhead(
+                mode=ai.SearchMode.TT_MINIMAX,
+                reserve_ms=Player.AI_RESERVE_MS,
+                workers=Player.AI_WORKERS,
+                time_scale=time_scale
+            )
+            game.controller = self.think_ahead
+            game.planner = self.think_ahead.plan
         else:
-            vec = Player.DIR_VECTOR[direction]     
-        return (self.tile_next[0] + vec[0], self.tile_next[1] + vec[1])
+            game.controller = self.ai_direction
 
-    def update_tile_next(self):
-        """Determine the next intermediate tile to go to. Should only run when we've reached target tile (self.tile_progress >= 1)"""
-        self.tile = self.tile_next
-        tile_check = self.get_facing_tile()
-        tile_state = self.maze.get_tile_state(Vector(*tile_check))
-        if tile_state not in [-1, 0, 4]:
-            self.tile_next = tile_check
+    def stop_ai(self):
+        """Stop any search still running in the background."""
+        if self.think_ahead != None:
+            self.think_ahead.stop()
+
+    def ai_direction(self, game) -> str:
+        """`Simulation.controller` for AI play: search within this tick's
+        share of what's left of the frame."""
+        budget = max(Player.AI_MIN_BUDGET_MS, self.play.app.frame_time_left_ms()/self.time_scale - Player.AI_RESERVE_MS)
+        return ai.next_move(game, mode=ai.SearchMode.TT_MINIMAX, time_budget_ms=budget, workers=Player.AI_WORKERS)
 
     def try_set_direction(self, direction: str):
-        if self.tile_progress >= 0.8:
-            state = self.maze.get_tile_state(Vector(*self.get_facing_tile(direction)))
-            if state not in [-1, 0, 4]:
-                self.facing = direction
+        self.state.game.steer(direction)
 
-    def update_rect(self):
-        current_tile = Vector(
-            lerp(self.tile[0], self.tile_next[0], self.tile_progress),
-            lerp(self.tile[1], self.tile_next[1], self.tile_progress)
-        )
-        px = mz.Maze.tile2pixelctr(current_tile)
-        self.rect.center = (px.x, px.y)
-
-    def move(self):
-        self.tile_progress += self.play.player_speed*app.Application.FRAME_TIME
-        if self.tile_progress >= 1:
-            self.tile = [self.tile_next[0], self.tile_next[1]]
-            self.try_set_direction(ai.next_move(self.play, 1))
-            self.tile_progress %= 1
-            self.maze.consume_tile(self.tile)
-            self.update_tile_next()
-            self.update_facing()
-        self.update_rect()
+    def reset(self):
+        """Runs whenever Pac Man respawns."""
+        self.death_animator.reset()
+        self.pacman_animator.reset()
 
-    def dying(self):
-        if self.death_phase == -1: # just got hit
-            self.play.sound.stop_all()
-            self.play.play_state.action_pause(60)
-            self.death_phase = 0
-        if self.death_phase == 0:
-            if not self.play.play_state.is_action_pausing:
-                self.play.play_state.hide_ghosts = True
-                self.play.play_state.action_pause(30)
-                self.death_phase = 1
-                self.image = self.death_animator.imagerect()
-        if self.death_phase == 1: # action pause w/ ghosts hidden
-            if not self.play.play_state.is_action_pausing:
-                # PLAY DEATH SOUND
-                self.play.sound.music_death()
-                self.play.play_state.action_pause(60*2)
-                self.death_phase = 2
-        if self.death_phase == 2:
-            if not self.play.play_state.is_action_pausing:
-                self.lives -= 1
-                self.play.reset()
+    def update_rect(self):
+        self.rect.center = mz.Maze.tile_center_px(*self.state.position())
 
     def draw(self):
         self.update_rect()
-        self.pacman_animator.key = self.facing
-        
-        if self.death_phase == -1:
+        self.pacman_animator.key = self.state.facing
+
+        death_phase = self.state.death_phase
+        if death_phase == -1 and self.drawn_death_phase != -1: # respawned
+            self.reset()
+        if death_phase == -1:
             self.image = self.pacman_animator.imagerect()
-        elif self.death_phase == 2:
+        elif death_phase == 1 and self.drawn_death_phase != 1:
+            self.image = self.death_animator.imagerect()
+        elif death_phase == 2:
             self.image = self.death_animator.imagerect()
+        self.drawn_death_phase = death_phase
 
         r = self.image.get_rect()
         r.center = self.rect.center
@@ -206,15 +130,8 @@ class Player(Sprite):
         self.maze.blit_relative(self.image, r)
 
         # draw lives
-        for i in range(self.lives):
+        for i in range(self.state.lives):
             img = self.pacman_animator.dict_frames['right'][1]
             r = img.get_rect()
             r.center = (720 + i*50, 200)
             self.maze.blit_relative(self.pacman_animator.dict_frames['right'][1], r)
-
-    def update(self):
-        if self.hit:
-            self.dying()
-        self.move()
-
-
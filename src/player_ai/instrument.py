@@ -0,0 +1,115 @@
+from bisect import bisect_left
+
+class Histogram:
+	"""Counts of values falling in buckets bounded above by `edges`; the last
+	bucket takes everything beyond the final edge."""
+	def __init__(self, edges: list[float]):
+		self.edges = list(edges)
+		self.counts = [0]*(len(self.edges) + 1)
+		self.total = 0
+		self.sum = 0.0
+
+	def add(self, value: float):
+		self.counts[bisect_left(self.edges, value)] += 1
+		self.total += 1
+		self.sum += value
+
+	def mean(self) -> float:
+		return self.sum/self.total if self.total > 0 else 0.0
+
+	def percentile(self, p: float) -> float:
+		"""Upper edge of the bucket holding the `p`th percentile (inf if it's
+		the overflow bucket)."""
+		if self.total == 0: return 0.0
+		rank = p/100*self.total
+		seen = 0
+		for i, count in enumerate(self.counts):
+			seen += count
+			if seen >= rank and count > 0:
+				return self.edges[i] if i < len(self.edges) else float('inf')
+		return float('inf')
+
+	def summary(self) -> dict:
+		return {
+			'edges': self.edges,
+			'counts': self.counts,
+			'mean': self.mean(),
+			'p50': self.percentile(50),
+			'p95': self.percentile(95)
+		}
+
+COUNTERS = ('nodes', 'leaves', 'prunes', 'tt_probes', 'tt_hits')
+"""Per-search counters, in the order `SearchStats.counts` returns them."""
+
+DECISION_MS_EDGES = [0.5, 1, 2, 4, 8, 16, 33, 66, 133]
+
+class SearchStats:
+	"""
+	What the search did, summed over every decision since `reset`.
+
+	The search bumps the counters directly (`nodes`, `leaves`, ...); the
+	move chooser wraps each decision in `begin_decision`/`end_decision` so
+	the per-decision numbers are kept in `last` and the histograms.
+	"""
+	def __init__(self, max_depth: int = 16):
+		self.max_depth = max_depth
+		self.reset()
+
+	def reset(self):
+		self.nodes = 0
+		"""Interior nodes whose children were searched."""
+		self.leaves = 0
+		"""States scored by `evaluate` or `evaluate_batch`."""
+		self.prunes = 0
+		"""Alpha-beta and min-node cutoffs (`SearchMode.EXPECTIMINIMAX` only)."""
+		self.tt_probes = 0
+		self.tt_hits = 0
+		"""Probes whose stored score settled the node outright."""
+
+		self.decisions = 0
+		self.think_time_s = 0.0
+		self.deepest = 0
+		"""Deepest completed iteration of any decision."""
+		self.decision_ms = Histogram(DECISION_MS_EDGES)
+		self.depth = Histogram(range(1, self.max_depth + 1))
+
+		self.last: dict = None
+		"""Counters, depth and time of the latest decision."""
+		self.started: tuple = None
+
+	def counts(self) -> tuple:
+		return tuple(getattr(self, c) for c in COUNTERS)
+
+	def add_counts(self, counts: tuple):
+		"""Add counters gathered elsewhere (a worker process's `counts()`)."""
+		for c, n in zip(COUNTERS, counts):
+			setattr(self, c, getattr(self, c) + n)
+
+	def begin_decision(self, now: float):
+		self.started = (now, self.counts())
+
+	def end_decision(self, now: float, depth: int):
+		start, before = self.started
+		elapsed_ms = (now - start)*1000
+		self.decisions += 1
+		self.think_time_s += elapsed_ms/1000
+		self.deepest = max(self.deepest, depth)
+		self.decision_ms.add(elapsed_ms)
+		self.depth.add(depth)
+
+		self.last = {c: after - b for c, after, b in zip(COUNTERS, self.counts(), before)}
+		self.last['depth'] = depth
+		self.last['ms'] = elapsed_ms
+
+	def summary(self) -> dict:
+		"""Everything as plain numbers, ready for `json.dumps`."""
+		ret = {c: getattr(self, c) for c in COUNTERS}
+		ret.update({
+			'decisions': self.decisions,
+			'think_time_s': self.think_time_s,
+			'deepest': self.deepest,
+			'tt_hit_rate': self.tt_hits/self.tt_probes if self.tt_probes > 0 else 0.0,
+			'decision_ms': self.decision_ms.summary(),
+			'depth': self.depth.summary()
+		})
+		return ret
@@ -1,11 +1,12 @@
 from __future__ import annotations
-from copy import deepcopy
+import random
 from util import get_facing
 
 from vector import Vector
 
-from ghost import Ghost
-from maze import Maze
+from sim.actors import GhostState
+from sim.maze_state import MazeState
+from maze_distance import MazeDistances, UNREACHABLE
 from ghost_ai import *
 
 class TerminalState(Enum):
@@ -13,35 +14,196 @@ class TerminalState(Enum):
 	ALIVE = 0
 	WIN = 1
 
+## ZOBRIST KEYS ##
+# One random 64-bit key per state feature; a state's hash is the XOR of the
+# keys of the features it has. Fixed seed so hashes are stable across runs.
+_zobrist_rng = random.Random(481)
+
+def _zobrist_keys(n: int) -> list[int]:
+	return [_zobrist_rng.getrandbits(64) for _ in range(n)]
+
+GHOST_NAMES = ('Blinky', 'Pinky', 'Inky', 'Clyde')
+NUM_TILES = MazeState.WIDTH*MazeState.HEIGHT
+
+Z_EATEN = _zobrist_keys(NUM_TILES)
+"""Per tile: the pellet/fruit that started there has been eaten."""
+Z_PLAYER = _zobrist_keys(NUM_TILES)
+Z_PLAYER_FACING = dict(zip(DIR_VECTOR, _zobrist_keys(4)))
+Z_GHOST = {name: _zobrist_keys(NUM_TILES) for name in GHOST_NAMES}
+Z_GHOST_FACING = {name: dict(zip(DIR_VECTOR, _zobrist_keys(4))) for name in GHOST_NAMES}
+Z_GHOST_STATE = {name: dict(zip(GhostMode, _zobrist_keys(len(GhostMode)))) for name in GHOST_NAMES}
+Z_CONSUMED = dict(zip([None, -1, 0, 1, 2, 3, 4, 5, 6, 7], _zobrist_keys(10)))
+"""Per value of `MMaze.consumed_tile`, which `evaluate` scores."""
+
+## BITBOARDS ##
+# Tile (x, y) is bit x + WIDTH*y of a Python int (same order as the maze
+# string). Walls, the ghost house door and the portals never change, so
+# they live in a static per-tile table; only the edibles are masks.
+STATIC_TILE_STATE = bytes(1 if c in '235' else int(c) for c in MazeState.FRESH_MAZE)
+"""Tile states with every pellet/fruit already eaten."""
+
+def maze_mask(maze: list[str], chars: str) -> int:
+	"""Bitmask of the tiles of `maze` whose state is one of `chars`."""
+	mask = 0
+	for strpos, c in enumerate(maze):
+		if c in chars:
+			mask |= 1 << strpos
+	return mask
+
+FRESH_EDIBLE_MASK = maze_mask(MazeState.FRESH_MAZE, '235')
+WALKABLE_MASK = maze_mask(MazeState.FRESH_MAZE, '123567')
+"""Tiles Pac Man can stand on."""
+COL_FIRST_MASK = sum(1 << (MazeState.WIDTH*y) for y in range(MazeState.HEIGHT))
+COL_LAST_MASK = COL_FIRST_MASK << (MazeState.WIDTH - 1)
+PORTAL_A_BIT = 1 << (MazeState.PORTAL_A_TILE[0] + MazeState.WIDTH*MazeState.PORTAL_A_TILE[1])
+PORTAL_B_BIT = 1 << (MazeState.PORTAL_B_TILE[0] + MazeState.WIDTH*MazeState.PORTAL_B_TILE[1])
+
+class PelletField:
+	"""
+	Multi-source BFS distance field: for every tile, the maze distance to
+	the nearest edible of a fixed set, and which edible that is.
+
+	Built once per search from the root's edibles. Eating only ever removes
+	edibles, so a tile's entry stays exact for as long as its nearest edible
+	is still there; `MMaze.nearest_pellet_dist` checks that before trusting it.
+	Shared, never copied, between all states of a search.
+	"""
+	def __init__(self, edible: int):
+		distances = MazeDistances.get()
+		self._index = distances._index
+
+		strposes = []
+		while edible:
+			low = edible & -edible
+			strposes.append(low.bit_length() - 1)
+			edible ^= low
+		cols = [self._index[strpos] for strpos in strposes if self._index[strpos] >= 0]
+		strposes = [strpos for strpos in strposes if self._index[strpos] >= 0]
+
+		if len(cols) == 0:
+			self._dist = None
+			return
+		sub = distances.dist[:, cols]
+		nearest = sub.argmin(axis=1)
+		self._dist = sub[range(len(sub)), nearest].tolist()
+		self._nearest = [strposes[c] for c in nearest.tolist()]
+
+	def lookup(self, tile: tuple[int, int]) -> tuple[int, int]:
+		"""(distance, strpos of the nearest edible) for `tile`, or None if
+		the field doesn't cover it."""
+		if self._dist == None: return None
+		x, y = tile
+		if x < 0 or x >= MazeState.WIDTH or y < 0 or y >= MazeState.HEIGHT: return None
+		idx = self._index[x + MazeState.WIDTH*y]
+		if idx < 0 or self._dist[idx] == UNREACHABLE: return None
+		return self._dist[idx], self._nearest[idx]
+
+	def __deepcopy__(self, memo):
+		return self
+
 class MMaze:
-	def __init__(self, cur_maze: list[str], remaining_pellets: int, consumed_tile: int = None):
-		# how much left to eat -- lower is better
-		self.remaining_pellets = remaining_pellets
-		self.maze = deepcopy(cur_maze)
+	def __init__(self, cur_maze: list[str], consumed_tile: int = None):
+		self.pellets = maze_mask(cur_maze, '2')
+		"""Food pellets left, as a bitmask."""
+		self.power = maze_mask(cur_maze, '3')
+		"""Power pellets left, as a bitmask."""
+		self.fruit = maze_mask(cur_maze, '5')
+		"""Bonus fruit left, as a bitmask."""
 		
 		# WARNING: only correct if consume_tile was called at active tile ONCE prior to read!
 		self.consumed_tile = consumed_tile
 
-	def get_tile_state(self, tile_vec: Vector):
-		"""Refer to `Maze.get_tile_state`"""
-		if ((tile_vec.x < 0 or tile_vec.x >= Maze.WIDTH) or\
-            (tile_vec.y < 0 or tile_vec.y >= Maze.HEIGHT)):
+		self.index_edibles()
+
+	@classmethod
+	def from_masks(cls, pellets: int, power: int, fruit: int, consumed_tile: int = None) -> MMaze:
+		"""Rebuild a maze from the bitmasks of another one (see `MState.pack`)."""
+		maze = cls.__new__(cls)
+		maze.pellets = pellets
+		maze.power = power
+		maze.fruit = fruit
+		maze.consumed_tile = consumed_tile
+		maze.index_edibles()
+		return maze
+
+	def index_edibles(self):
+		"""Derive the Zobrist key and pellet field from the edible masks."""
+		self.key = 0
+		"""Zobrist key of the eaten pellets/fruit, kept up to date by `consume_tile`."""
+		eaten = FRESH_EDIBLE_MASK & ~self.edible()
+		while eaten:
+			low = eaten & -eaten
+			self.key ^= Z_EATEN[low.bit_length() - 1]
+			eaten ^= low
+
+		self.pellet_field = PelletField(self.edible())
+		"""Nearest-edible index for the edibles present at construction."""
+
+	@property
+	def remaining_pellets(self) -> int:
+		"""How much left to eat -- lower is better"""
+		return (self.pellets | self.power).bit_count()
+
+	def edible(self) -> int:
+		"""Bitmask of every tile with a pellet, power pellet or fruit on it."""
+		return self.pellets | self.power | self.fruit
+
+	def tile_state(self, x: int, y: int) -> int:
+		"""`get_tile_state` without building a `Vector`."""
+		if x < 0 or x >= MazeState.WIDTH or y < 0 or y >= MazeState.HEIGHT:
 			return -1
 
-		strpos = Maze.tile2strpos(tile_vec)
-		return int(self.maze[strpos])
+		strpos = x + MazeState.WIDTH*y
+		bit = 1 << strpos
+		if self.pellets & bit: return 2
+		if self.power & bit: return 3
+		if self.fruit & bit: return 5
+		return STATIC_TILE_STATE[strpos]
+
+	def get_tile_state(self, tile_vec: Vector):
+		"""Refer to `MazeState.get_tile_state`"""
+		return self.tile_state(int(tile_vec.x), int(tile_vec.y))
 
 	def consume_tile(self, tile: tuple[int, int]):
 		"""Change tile state at `tile_vec`."""
-		vec = Vector(*tile)
-		self.consumed_tile = self.get_tile_state(vec)
-		strpos = Maze.tile2strpos(vec)
+		self.consumed_tile = self.tile_state(tile[0], tile[1])
+		if self.consumed_tile not in [2, 3, 5]: return
+
+		strpos = tile[0] + MazeState.WIDTH*tile[1]
+		bit = ~(1 << strpos)
+		self.pellets &= bit
+		self.power &= bit
+		self.fruit &= bit
+		self.key ^= Z_EATEN[strpos]
+
+	def nearest_pellet_dist(self, tile: tuple[int, int]) -> float:
+		"""
+		Maze distance from `tile` to the closest pellet, power pellet or
+		fruit (inf if there is none).
+
+		Answered from `pellet_field` unless the edible it points at has since
+		been eaten; then a BFS is run on the bitmasks, expanding the whole
+		frontier with a few shifts per step until it touches an edible.
+		"""
+		hit = self.pellet_field.lookup(tile)
+		edible = self.edible()
+		if hit != None and (edible >> hit[1]) & 1:
+			return hit[0]
 
-		if self.consumed_tile in [2, 3]: # food/power pellet
-			self.remaining_pellets -= 1
-			self.maze[strpos] = '1'
-		elif self.consumed_tile == 5: # bonus fruit 
-			self.maze[strpos] = '1'
+		x, y = tile
+		if x < 0 or x >= MazeState.WIDTH or y < 0 or y >= MazeState.HEIGHT: return float('inf')
+		frontier = visited = 1 << (x + MazeState.WIDTH*y)
+		dist = 0
+		while frontier:
+			if frontier & edible: return dist
+			grown = ((frontier << 1) & ~COL_FIRST_MASK) | ((frontier >> 1) & ~COL_LAST_MASK)\
+				| (frontier << MazeState.WIDTH) | (frontier >> MazeState.WIDTH)
+			if frontier & PORTAL_A_BIT: grown |= PORTAL_B_BIT
+			if frontier & PORTAL_B_BIT: grown |= PORTAL_A_BIT
+			frontier = grown & WALKABLE_MASK & ~visited
+			visited |= frontier
+			dist += 1
+		return float('inf')
 
 class MPlayer:
 	def __init__(self, tile: tuple[int, int], facing: str):
@@ -52,18 +214,41 @@ class MPlayer:
 		self.facing = get_facing(self.tile, tile)
 		self.tile = tile
 
+PLAYER_MOVES_CACHE: dict[tuple[int, int], tuple[str, ...]] = {}
+"""Directions Pac Man can move in, per tile."""
+
 class MGhost:
-	def __init__(self, ghost: Ghost):
+	def __init__(self, ghost: GhostState):
 		self.name = ghost.name
 		self.tile = ghost.tile
 		self.facing = ghost.facing
 		self.state = ghost.mode
+
+	@classmethod
+	def from_fields(cls, name: str, tile: tuple[int, int], facing: str, state: GhostMode) -> MGhost:
+		ghost = cls.__new__(cls)
+		ghost.name = name
+		ghost.tile = tile
+		ghost.facing = facing
+		ghost.state = state
+		return ghost
+
+	def legal_moves(self) -> tuple[tuple[int, int], ...]:
+		"""
+		Tiles the ghost may step to next, following the same rules as
+		`get_next_move_tile`: no reversing unless cornered, no walls or
+		portals, and no ghost house door outside of the house modes.
+		"""
+		return get_ghost_exits(self.tile, self.facing, self.state)
+
+	def move_to(self, tile: tuple[int, int]):
+		self.facing = get_facing(self.tile, tile)
+		self.tile = tile
 	
 	def step(
 		self,
 		player:MPlayer,
-		ghosts: dict[str, MGhost],
-		maze: MMaze
+		ghosts: dict[str, MGhost]
 	):
 		"""Simulate the ghost taking its next step"""
 		target_tile: tuple[int, int]
@@ -90,50 +275,190 @@ class MGhost:
 		next_tile = get_next_move_tile(
 			from_tile=self.tile,
 			target_tile=target_tile,
-			maze=maze,
 			facing=self.facing
 		)
-		self.facing = get_facing(self.tile, next_tile)
-		self.tile = next_tile
+		self.move_to(next_tile)
 
 class MState:
 	def __init__(self,
 		player: MPlayer,
 		maze: list[str],
-		ghosts: list[Ghost],
-		remaining_pellets: int
+		ghosts: list[GhostState],
+		rng: random.Random = None
 	):
 		"""Construct an AI-model state from existing game state."""
 		self.player = player
-		self.maze = MMaze(maze, remaining_pellets)
+		self.maze = MMaze(maze)
 		self.ghosts: dict[str, MGhost] = {}
 		for g in ghosts:
 			self.ghosts[g.name] = MGhost(g)
 
+		self.history: list[tuple] = []
+		"""Undo records pushed by the `apply_*` methods, newest last."""
+
+		self.rng = rng
+		"""The game's stream for the AI's random choices (the global `random`
+		if None). Shared, not copied, by `player_ai.step`."""
+
 	def terminal(self):
 		for g in self.ghosts.values():
 			if g.state in [GhostMode.CHASE, GhostMode.SCATTER]\
 				and g.tile == self.player.tile:
 				return TerminalState.DEAD
 
-		if self.maze.remaining_pellets == 0:
+		if (self.maze.pellets | self.maze.power) == 0:
 			return TerminalState.WIN
 			
 		return TerminalState.ALIVE
 
 	def consume_current_tile(self):
 		self.maze.consume_tile(self.player.tile)
+
+	def player_moves(self) -> tuple[str, ...]:
+		"""Directions Pac Man can move in from his tile, in up/down/left/right order."""
+		tile = tuple(self.player.tile)
+		moves = PLAYER_MOVES_CACHE.get(tile)
+		if moves is None:
+			moves = []
+			for direction in ['up', 'down', 'left', 'right']:
+				vec = DIR_VECTOR[direction]
+				dest_tile = (tile[0] + vec[0], tile[1] + vec[1])
+				if self.maze.tile_state(*dest_tile) not in [-1, 0, 4]:
+					moves.append(direction)
+			moves = tuple(moves)
+			PLAYER_MOVES_CACHE[tile] = moves
+		return moves
+
+	## MAKE/UNMAKE ##
+	# Each apply_* call changes the state in place and pushes exactly one
+	# record onto `self.history`; `undo` pops it and puts things back.
+	# A record is (player part, ghost part), either of which may be None:
+	# player part: (tile, pellets, power, fruit, consumed_tile, key)
+	# ghost part: ((ghost, tile, facing), ...)
+
+	def _move_player(self, direction: str):
+		tile = self.player.tile
+		dest_tile = (tile[0] + DIR_VECTOR[direction][0], tile[1] + DIR_VECTOR[direction][1])
+		if self.maze.tile_state(*dest_tile) in [-1, 0, 4]: return None
+
+		maze = self.maze
+		record = (tile, maze.pellets, maze.power, maze.fruit, maze.consumed_tile, maze.key)
+		self.player.tile = dest_tile
+		self.consume_current_tile()
+		return record
+
+	def _step_ghosts(self, skip):
+		record = tuple((g, g.tile, g.facing) for g in self.ghosts.values() if g.name not in skip)
+		for g, _, _ in record:
+			g.step(self.player, self.ghosts)
+		return record
+
+	def apply(self, direction: str) -> bool:
+		"""
+		Play one ply: Pac Man moves one tile towards `direction` and consumes
+		it, then every ghost takes its scripted step (unless Pac Man walked
+		into one). Returns False and changes nothing if the tile isn't
+		traversable.
+		"""
+		player_record = self._move_player(direction)
+		if player_record == None: return False
+
+		ghost_record = None
+		if self.terminal() != TerminalState.DEAD:
+			ghost_record = self._step_ghosts(())
+		self.history.append((player_record, ghost_record))
+		return True
+
+	def apply_player(self, direction: str) -> bool:
+		"""Like `apply`, but only Pac Man moves."""
+		player_record = self._move_player(direction)
+		if player_record == None: return False
+		self.history.append((player_record, None))
+		return True
+
+	def apply_ghost(self, name: str, tile: tuple[int, int]):
+		"""Move ghost `name` to the adjacent `tile`."""
+		g = self.ghosts[name]
+		self.history.append((None, ((g, g.tile, g.facing),)))
+		g.move_to(tile)
+
+	def apply_ghosts(self, skip: list[str] = ()):
+		"""Every ghost not in `skip` takes its scripted step."""
+		self.history.append((None, self._step_ghosts(skip)))
+
+	def undo(self):
+		"""Revert the latest `apply_*` call."""
+		player_record, ghost_record = self.history.pop()
+		if player_record != None:
+			tile, pellets, power, fruit, consumed_tile, key = player_record
+			self.player.tile = tile
+			maze = self.maze
+			maze.pellets = pellets
+			maze.power = power
+			maze.fruit = fruit
+			maze.consumed_tile = consumed_tile
+			maze.key = key
+		if ghost_record != None:
+			for g, tile, facing in ghost_record:
+				g.tile = tile
+				g.facing = facing
+
+	def undo_all(self):
+		"""Revert every applied move, e.g. after an aborted search."""
+		while len(self.history) > 0:
+			self.undo()
+
+	def pack(self) -> tuple:
+		"""
+		This state as a small tuple of ints and strings, cheap to pickle
+		for another process. `MState.unpack` rebuilds it; undo history is
+		not carried over.
+		"""
+		maze = self.maze
+		return (
+			tuple(self.player.tile), self.player.facing,
+			maze.pellets, maze.power, maze.fruit, maze.consumed_tile,
+			tuple((g.name, tuple(g.tile), g.facing, g.state.value) for g in self.ghosts.values())
+		)
+
+	@classmethod
+	def unpack(cls, packed: tuple) -> MState:
+		tile, facing, pellets, power, fruit, consumed_tile, ghosts = packed
+		state = cls.__new__(cls)
+		state.player = MPlayer(tile, facing)
+		state.maze = MMaze.from_masks(pellets, power, fruit, consumed_tile)
+		state.ghosts = {}
+		for name, g_tile, g_facing, g_state in ghosts:
+			state.ghosts[name] = MGhost.from_fields(name, g_tile, g_facing, GhostMode(g_state))
+		state.history = []
+		state.rng = None
+		return state
+
+	def zobrist(self) -> int:
+		"""
+		64-bit Zobrist hash of everything the search depends on: eaten
+		pellets, the last consumed tile, Pac Man's tile and facing, and
+		every ghost's tile, facing and mode.
+		"""
+		px, py = self.player.tile
+		key = self.maze.key ^ Z_CONSUMED[self.maze.consumed_tile]\
+			^ Z_PLAYER[px + MazeState.WIDTH*py] ^ Z_PLAYER_FACING[self.player.facing]
+		for name, g in self.ghosts.items():
+			gx, gy = g.tile
+			key ^= Z_GHOST[name][gx + MazeState.WIDTH*gy]\
+				^ Z_GHOST_FACING[name][g.facing] ^ Z_GHOST_STATE[name][g.state]
+		return key
 	
 	def __repr__(self):
-		maze = deepcopy(self.maze.maze)
-		maze[Maze.tile2strpos(Vector(*self.player.tile))] = "P"
+		maze = [str(self.maze.tile_state(x, y)) for y in range(MazeState.HEIGHT) for x in range(MazeState.WIDTH)]
+		maze[MazeState.strpos(*self.player.tile)] = "P"
 		for k, g in self.ghosts.items():
-			maze[Maze.tile2strpos(Vector(*g.tile))] = k[0]
+			maze[MazeState.strpos(*g.tile)] = k[0]
 		
 		ret = ""
-		for y in range(0, Maze.HEIGHT):
-			for x in range(0, Maze.WIDTH):
-				char = maze[Maze.WIDTH*y + x]
+		for y in range(0, MazeState.HEIGHT):
+			for x in range(0, MazeState.WIDTH):
+				char = maze[MazeState.WIDTH*y + x]
 				char = " " if char == "1" else char
 				char = "." if char == "2" else char
 				ret += f' {char} '
@@ -0,0 +1,91 @@
+import math
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from maze_distance import MazeDistances
+
+bound = None
+"""Best root score found so far by any worker of the current search, in
+shared memory. Set in each worker by `init_worker`."""
+
+abort = None
+"""Raised by the pool to stop every worker's search; None outside workers."""
+
+POLL_INTERVAL = 0.001
+"""Seconds between checks for cancellation while waiting on the workers."""
+
+def init_worker(shared_bound, shared_abort):
+	global bound, abort
+	bound = shared_bound
+	abort = shared_abort
+	MazeDistances.get()
+
+def aborted() -> bool:
+	"""Whether this worker's pool wants its searches stopped."""
+	return abort != None and abort.value
+
+def read_bound() -> float:
+	return bound.value
+
+def raise_bound(score: float):
+	"""Publish `score` to the other workers if it beats the bound."""
+	with bound.get_lock():
+		if score > bound.value:
+			bound.value = score
+
+class RootPool:
+	"""
+	Worker processes that each search one root move's subtree.
+
+	Workers share one bound (the best root score so far): a worker reads it
+	as alpha before its search and raises it when done, so moves picked up
+	later are pruned against everything finished before them. They also
+	share an abort flag, which the search checks with its deadline.
+
+	Workers are spawned rather than forked: the game's process has SDL and
+	the `ThinkAhead` thread running, neither of which survives a fork.
+	"""
+	def __init__(self, workers: int):
+		self.workers = workers
+		context = mp.get_context('spawn')
+		self.bound = context.Value('d', -math.inf)
+		self.abort = context.Value('b', False, lock=False)
+		self.executor = ProcessPoolExecutor(
+			workers,
+			mp_context=context,
+			initializer=init_worker,
+			initargs=(self.bound, self.abort)
+		)
+
+	def map(self, fn, jobs: list[tuple], cancelled=None) -> list:
+		"""
+		`fn(*job)` for every job, spread over the workers, with a fresh
+		bound. Results come back in the order of `jobs`.
+
+		`cancelled` is polled while the workers run; once it returns True,
+		the workers are told to abort, and None is returned as soon as they
+		have.
+		"""
+		self.bound.value = -math.inf
+		self.abort.value = False
+		futures = [self.executor.submit(fn, *job) for job in jobs]
+		while True:
+			_, pending = wait(futures, timeout=POLL_INTERVAL)
+			if len(pending) == 0:
+				return [f.result() for f in futures]
+			if cancelled != None and cancelled():
+				self.abort.value = True
+				for f in pending: f.cancel()
+				wait(futures)
+				return None
+
+	def shutdown(self):
+		self.executor.shutdown()
+
+pools: dict[int, RootPool] = {}
+"""Pools by worker count, started on first use and kept for the process."""
+
+def get_pool(workers: int) -> RootPool:
+	if workers not in pools:
+		pools[workers] = RootPool(workers)
+	return pools[workers]
@@ -1,10 +1,94 @@
 from copy import deepcopy
-import math
+import random
+import time
 import numpy as np
 
 from ghost_ai import *
-import play as pl
+from maze_distance import MazeDistances
 from .model import *
+from .transposition import Bound, TranspositionTable
+from . import parallel
+from .instrument import SearchStats
+
+class SearchMode(Enum):
+	MINIMAX = 0
+	TT_MINIMAX = 1
+	"""`MINIMAX` with a transposition table (see `tt_minimax`): the same
+	moves, but positions reached again are looked up instead of searched.
+	With Pac Man the only player there is nothing to prune."""
+	EXPECTIMINIMAX = 2
+	"""Alpha-beta where ghosts get their own layers: min nodes while hostile,
+	uniform chance nodes while frightened."""
+
+GHOST_BRANCH_CAP = 2
+"""Most ghosts per ply searched as min/chance layers; the rest are scripted."""
+
+GHOST_MOVE_CAP = 2
+"""Most moves per ghost layer, closest to Pac Man first."""
+
+GHOST_DANGER = 120
+"""`evaluate` subtracts this over the maze distance to each hostile ghost."""
+
+CONSUME_SCORE = {
+	2: 10, # food pellet
+	3: 20, # power pellet
+	5: 8   # bonus fruit
+}
+"""`evaluate`'s reward per value of `MMaze.consumed_tile`."""
+
+prev_best_move: str = None
+"""Best root move found on the previous tick; searched first next tick."""
+
+MAX_DEPTH = 16
+"""Deepest iteration tried by a time-budgeted `next_move`."""
+
+deadline: float = None
+"""`time.perf_counter()` value at which a timed search gives up."""
+
+transposition_tables = {
+	SearchMode.TT_MINIMAX: TranspositionTable(),
+	SearchMode.EXPECTIMINIMAX: TranspositionTable()
+}
+"""Search results per mode, kept across `next_move` calls so consecutive
+ticks reuse each other's work."""
+
+stats: SearchStats = None
+"""What the search has done this game; None (the default) skips counting."""
+
+def enable_stats(enabled: bool = True) -> SearchStats:
+	"""Start (or stop) collecting `stats`. Returns the collector."""
+	global stats
+	stats = SearchStats(MAX_DEPTH) if enabled else None
+	return stats
+
+def new_game():
+	"""Forget what earlier games taught the search; call before each game
+	when reusing the module for several of them."""
+	global prev_best_move
+	prev_best_move = None
+	for tt in transposition_tables.values():
+		tt.clear()
+	if stats != None:
+		stats.reset()
+
+abort_requested = False
+"""Set by `abort_search` to stop a search running on another thread
+(and, through `parallel.RootPool`, its worker processes)."""
+
+class SearchTimeout(Exception):
+	"""Raised inside the search once `deadline` has passed, or when the
+	search is aborted."""
+
+def check_deadline():
+	if abort_requested or (deadline != None and time.perf_counter() > deadline)\
+		or parallel.aborted():
+		raise SearchTimeout()
+
+def abort_search(abort: bool = True):
+	"""Make the running search raise `SearchTimeout` at its next deadline
+	check. Call again with False once it has stopped."""
+	global abort_requested
+	abort_requested = abort
 
 def manhattan_dist(point1, point2):
     distance = 0
@@ -26,33 +110,15 @@ def step(state: MState, direction: str) -> MState:
 
 	If the state is already terminal, return the same state, since
 	nothing else can happen.
+
+	The search itself works in place with `MState.apply`/`MState.undo`.
 	"""
 	if state.terminal() != TerminalState.ALIVE: return state
+	if direction not in state.player_moves(): return None
 
-	dest_tile =\
-		(state.player.tile[0] + DIR_VECTOR[direction][0],
-		state.player.tile[1] + DIR_VECTOR[direction][1])
-
-	# traversable tile check
-	tile_state = state.maze.get_tile_state(Vector(*dest_tile))
-	if tile_state in [-1, 0, 4]: return None
-
-	ret = deepcopy(state)
-
-	# move pac man, consume tile
-	ret.player.tile = dest_tile
-	ret.consume_current_tile()
-
-	if ret.terminal() == TerminalState.DEAD: return ret
-
-	# ghosts
-	for g in ret.ghosts.values():
-		g.step(
-			ret.player,
-			ret.ghosts,
-			ret.maze
-		)
-	
+	ret = deepcopy(state, memo={id(state.rng): state.rng})
+	ret.apply(direction)
+	ret.history = []
 	return ret
 
 
@@ -80,6 +146,8 @@ def evaluate(state: MState) -> int:
 	-∞ for death state,
 	+∞ if state results in last pellet eaten (WIN!)
 	"""
+	if stats != None: stats.leaves += 1
+
 	# terminal state check
 	match state.terminal():
 		case TerminalState.DEAD:
@@ -88,56 +156,34 @@ def evaluate(state: MState) -> int:
 			return float('inf')
 
 	player = state.player
-	p_x, p_y = player.tile
 	state_value = 0
 
 	# Check player position from the ghosts position
+	distances = MazeDistances.get()
 	ghost_scr = 0
 	for g in state.ghosts.values():
 		if g.state not in [GhostMode.CHASE, GhostMode.SCATTER]: continue
 
-		# x2, y2 = g.tile
-		
-		# dist_squared = (x2 - x1)**2 + (y2 - y1)**2
-		dist = manhattan_dist(g.tile, player.tile)
-		ghost_scr -= 120/dist
+		# true maze distance; walls can make a close ghost harmless
+		dist = distances.distance(g.tile, player.tile)
+		if dist == None:
+			dist = manhattan_dist(g.tile, player.tile)
+		ghost_scr -= GHOST_DANGER/dist
 
-	print(f'ghost_scr: {ghost_scr}')
 	state_value += ghost_scr
 
 	# check consumed tile
-	next_tile_state = state.maze.consumed_tile
-	consume_scr = 0
-	if next_tile_state == 2:
-		consume_scr = 10
-	elif next_tile_state == 3:
-		consume_scr = 20
-	elif next_tile_state == 5:
-		consume_scr = 8
-	
-	print(f'consume_scr: {consume_scr}')
+	consume_scr = CONSUME_SCORE.get(state.maze.consumed_tile, 0)
 	state_value += consume_scr
 
 	# nearest pellet
-	pellet_layer_found = False
-	nearest_pellet_dist = float('inf')
-	for i in range(1, 100):
-		for y in range(-i, i):
-			for x in range(-i, i):
-				tile = (p_x+x, p_y+y)
-				if state.maze.get_tile_state(Vector(*tile)) in [2,3,5]:
-					nearest_pellet_dist =\
-						min(manhattan_dist(tile, player.tile), nearest_pellet_dist)
-					pellet_layer_found = True
-		if pellet_layer_found: break
+	nearest_pellet_dist = state.maze.nearest_pellet_dist(player.tile)
 
 	pellet_scr = -nearest_pellet_dist
-	print(f'pellet_scr: {pellet_scr}')
 	state_value += pellet_scr
 
 	# number of pellets remaining in maze
 	# remain_scr = 20 * (Maze.NUM_PELLETS - state.maze.remaining_pellets)
-	# print(f'remain_scr: {remain_scr}')
 	# state_value += remain_scr
 				
 	# nearest power pellet
@@ -147,7 +193,6 @@ def evaluate(state: MState) -> int:
 	# 		for x in range(-i, i):
 	# 			if state.maze.get_tile_state(Vector(x1+x, y1+y)) == 3:
 	# 				power_scr = 0.25*(100-i)
-	# 				print(f'power_scr: {power_scr}')
 	# 				state_value += power_scr
 	# 				break_flag = True
 	# 				break
@@ -156,6 +201,93 @@ def evaluate(state: MState) -> int:
 
 	return state_value
 
+HOSTILE_MODES = (GhostMode.CHASE, GhostMode.SCATTER)
+
+class LeafBatch:
+	"""
+	Features of many leaf states, gathered one by one during a search and
+	scored all at once by `evaluate_batch`.
+	"""
+	def __init__(self):
+		self.terminal: list[int] = []
+		self.tiles: list[int] = []
+		"""x, y of Pac Man's tile then of each ghost's, flattened."""
+		self.hostile: list[bool] = []
+		"""Whether each ghost is hostile, flattened."""
+		self.consumed: list[int] = []
+		"""`CONSUME_SCORE` of the tile eaten on the way in."""
+		self.edible: list[int] = []
+		"""`MMaze.edible()` bitmask."""
+
+	def __len__(self):
+		return len(self.terminal)
+
+	def add(self, state: MState, terminal: TerminalState = None) -> int:
+		"""Record `state`'s features (`terminal` saves recomputing
+		`state.terminal()`); returns its row in the batch."""
+		if terminal == None: terminal = state.terminal()
+		self.terminal.append(terminal.value)
+		self.tiles.extend(state.player.tile)
+		for g in state.ghosts.values():
+			self.tiles.extend(g.tile)
+			self.hostile.append(g.state in HOSTILE_MODES)
+		self.consumed.append(CONSUME_SCORE.get(state.maze.consumed_tile, 0))
+		self.edible.append(state.maze.edible())
+		return len(self.terminal) - 1
+
+EDIBLE_BYTES = (NUM_TILES + 7)//8
+
+def tile_rows(tiles: np.ndarray, index: np.ndarray) -> np.ndarray:
+	"""Row of `MazeDistances.dist` for each (x, y) in `tiles`; -1 where
+	the tile is out of bounds or not traversable."""
+	x, y = tiles[..., 0], tiles[..., 1]
+	inside = (x >= 0) & (x < MazeState.WIDTH) & (y >= 0) & (y < MazeState.HEIGHT)
+	strpos = np.where(inside, x + MazeState.WIDTH*y, 0)
+	return np.where(inside, index[strpos], -1)
+
+def evaluate_batch(leaves: LeafBatch) -> np.ndarray:
+	"""
+	`evaluate` for every state in `leaves` at once, with array operations.
+	Returns the scores in row order; they are bit-for-bit what `evaluate`
+	returns for the same states.
+	"""
+	distances = MazeDistances.get()
+	index = distances.tile_index.astype(np.intp)
+	dist = distances.dist
+
+	n = len(leaves)
+	if stats != None: stats.leaves += n
+	terminal = np.array(leaves.terminal, dtype=np.int8)
+	tiles = np.array(leaves.tiles, dtype=np.intp).reshape(n, -1, 2)
+	player_xy, ghost_xy = tiles[:, 0], tiles[:, 1:]
+	hostile = np.array(leaves.hostile, dtype=bool).reshape(n, -1)
+	player = tile_rows(player_xy, index)
+	ghosts = tile_rows(ghost_xy, index)
+
+	# ghost danger: maze distance, or Manhattan where there's no path
+	ghost_scr = np.zeros(n)
+	for j in range(ghosts.shape[1]):
+		d = dist[player, ghosts[:, j]].astype(np.float64)
+		no_path = (ghosts[:, j] < 0) | (player < 0) | (d == UNREACHABLE)
+		manhattan = np.abs(player_xy - ghost_xy[:, j]).sum(axis=1)
+		d = np.where(no_path, manhattan, d)
+		with np.errstate(divide='ignore'):
+			ghost_scr -= np.where(hostile[:, j], GHOST_DANGER/d, 0)
+
+	# nearest edible: closest column of Pac Man's distance row still edible
+	raw = np.frombuffer(b''.join(m.to_bytes(EDIBLE_BYTES, 'little') for m in leaves.edible), dtype=np.uint8)
+	bits = np.unpackbits(raw.reshape(n, EDIBLE_BYTES), axis=1, bitorder='little')
+	edible_cols = bits[:, distances.strposes].astype(bool)
+	rows = dist[np.maximum(player, 0)]
+	nearest = np.where(edible_cols, rows, UNREACHABLE).min(axis=1).astype(np.float64)
+	nearest[(nearest == UNREACHABLE) | (player < 0)] = np.inf
+
+	value = ghost_scr + np.array(leaves.consumed, dtype=np.float64)
+	value = value + -nearest
+	value[terminal == TerminalState.DEAD.value] = -np.inf
+	value[terminal == TerminalState.WIN.value] = np.inf
+	return value
+
 def minimax(state: MState, depth: int = 1) -> int:
 	"""
 	Recursive minimax function. Explores more states based on depth
@@ -163,46 +295,518 @@ def minimax(state: MState, depth: int = 1) -> int:
 	"""
 	if depth <= 1 or state.terminal() != TerminalState.ALIVE:
 		return evaluate(state)
+	check_deadline()
+	if stats != None: stats.nodes += 1
 	
 	value = -float('inf')
-	for v in explore_states(state).values():
-		value = max(minimax(v, depth-1), value)
+	for direction in state.player_moves():
+		state.apply(direction)
+		value = max(minimax(state, depth-1), value)
+		state.undo()
+
+	return value
+
+
+def minimax_batched(state: MState, depth: int = 1) -> float:
+	"""
+	`minimax`, but the whole leaf layer is scored by a single
+	`evaluate_batch` call: the tree is walked once to collect leaves, then
+	the scores are backed up through it.
+	"""
+	leaves = LeafBatch()
+	tree = collect_leaves(state, depth, leaves)
+	return back_up(tree, evaluate_batch(leaves).tolist())
+
+def collect_leaves(state: MState, depth: int, leaves: LeafBatch):
+	"""Shape of the `minimax` tree below `state`: a leaf's row in `leaves`,
+	or a list of child trees."""
+	terminal = state.terminal()
+	if depth <= 1 or terminal != TerminalState.ALIVE:
+		return leaves.add(state, terminal)
+	check_deadline()
+	if stats != None: stats.nodes += 1
+
+	children = []
+	for direction in state.player_moves():
+		state.apply(direction)
+		children.append(collect_leaves(state, depth-1, leaves))
+		state.undo()
+	return children
+
+def back_up(tree, scores: list[float]) -> float:
+	if isinstance(tree, int):
+		return scores[tree]
+	value = -float('inf')
+	for child in tree:
+		value = max(back_up(child, scores), value)
+	return value
+
+
+CONSUME_ORDER = {
+	3: 3, # power pellet
+	2: 2, # food pellet
+	5: 1  # bonus fruit
+}
+"""Move-ordering priority of the tile consumed by a move."""
+
+def order_moves(state: MState, moves: list[str], first: str = None) -> list[str]:
+	"""
+	Sort `moves` so the likely-best one is searched first.
+
+	`first` (if present) always leads. The rest are ordered by a cheap
+	heuristic on the state after Pac Man's move (ghosts left where they are,
+	see `MState.apply_player`): terminal outcome, then what was eaten on the
+	move, then distance to the closest hostile ghost.
+	"""
+	def key(direction: str):
+		state.apply_player(direction)
+
+		match state.terminal():
+			case TerminalState.WIN:
+				outcome = 0
+			case TerminalState.DEAD:
+				outcome = 2
+			case _:
+				outcome = 1
+
+		ghost_dist = min(
+			(manhattan_dist(g.tile, state.player.tile) for g in state.ghosts.values()
+				if g.state in [GhostMode.CHASE, GhostMode.SCATTER]),
+			default=0
+		)
+		consumed = state.maze.consumed_tile
+		state.undo()
+
+		return (
+			direction != first,
+			outcome,
+			-CONSUME_ORDER.get(consumed, 0),
+			-ghost_dist
+		)
+
+	return sorted(moves, key=key)
+
+
+def tt_minimax(state: MState, depth: int = 1) -> float:
+	"""
+	`minimax`, searching in place and storing every node's score in the
+	transposition table, so positions reached again (by another move order,
+	or on a later tick) are looked up instead of searched. Stored scores
+	may come from a deeper search than `depth`.
+	"""
+	if depth <= 1 or state.terminal() != TerminalState.ALIVE:
+		return evaluate(state)
+	check_deadline()
+
+	table = transposition_tables[SearchMode.TT_MINIMAX]
+	key = state.zobrist()
+	entry = table.probe(key)
+	if stats != None: stats.tt_probes += 1
+	if entry != None and entry.depth >= depth:
+		if stats != None: stats.tt_hits += 1
+		return entry.value
+	if stats != None: stats.nodes += 1
+
+	value, best_move = -float('inf'), None
+	for k in state.player_moves():
+		state.apply(k)
+		scr = tt_minimax(state, depth-1)
+		state.undo()
+		if scr > value:
+			value, best_move = scr, k
+
+	table.store(key, depth, value, Bound.EXACT, best_move)
+	return value
+
+
+def tt_lookup(
+	table: TranspositionTable,
+	key: int,
+	depth: int,
+	alpha: float,
+	beta: float
+) -> tuple[float, str]:
+	"""
+	Returns (score, best move) for a node. Score is None unless a stored
+	search at least `depth` deep settles the node for this window; the best
+	move (possibly None) is still worth searching first.
+	"""
+	entry = table.probe(key)
+	if stats != None: stats.tt_probes += 1
+	if entry == None:
+		return None, None
+
+	if entry.depth >= depth:
+		if entry.bound == Bound.EXACT\
+			or (entry.bound == Bound.LOWER and entry.value > beta)\
+			or (entry.bound == Bound.UPPER and entry.value < alpha):
+			if stats != None: stats.tt_hits += 1
+			return entry.value, entry.best_move
+
+	return None, entry.best_move
+
+
+def tt_store(
+	table: TranspositionTable,
+	key: int,
+	depth: int,
+	value: float,
+	alpha: float,
+	beta: float,
+	best_move: str
+):
+	"""Store a search result, classifying it against the window it was searched with."""
+	if value < alpha:
+		bound = Bound.UPPER
+	elif value > beta:
+		bound = Bound.LOWER
+	else:
+		bound = Bound.EXACT
+	table.store(key, depth, value, bound, best_move)
+
+
+def adversarial_ghosts(state: MState, depth: int) -> list[str]:
+	"""
+	Names of the ghosts to branch on this ply, at most `GHOST_BRANCH_CAP`.
+
+	Only ghosts close enough to reach Pac Man within the remaining `depth`
+	plies are considered; hostile ghosts come before frightened ones, then
+	nearest first.
+	"""
+	candidates = []
+	for g in state.ghosts.values():
+		if g.state not in [GhostMode.CHASE, GhostMode.SCATTER, GhostMode.FRIGHTENED]:
+			continue
+		dist = manhattan_dist(g.tile, state.player.tile)
+		if dist > 2*depth: continue
+		candidates.append((g.state == GhostMode.FRIGHTENED, dist, g.name))
+
+	return [name for _, _, name in sorted(candidates)[:GHOST_BRANCH_CAP]]
+
+
+def ghost_moves(state: MState, name: str) -> list[tuple[int, int]]:
+	"""Legal moves of ghost `name`, closest to Pac Man first, capped at `GHOST_MOVE_CAP`."""
+	moves = state.ghosts[name].legal_moves()
+	if len(moves) <= GHOST_MOVE_CAP: return moves
+	return sorted(moves, key=lambda t: manhattan_dist(t, state.player.tile))[:GHOST_MOVE_CAP]
+
+
+def expectiminimax(
+	state: MState,
+	depth: int = 1,
+	alpha: float = -float('inf'),
+	beta: float = float('inf')
+) -> float:
+	"""
+	Max layer of the adversarial search: Pac Man picks a move, then
+	`ghost_layer` lets the ghosts answer it.
+	"""
+	if depth <= 1 or state.terminal() != TerminalState.ALIVE:
+		return evaluate(state)
+	check_deadline()
+
+	table = transposition_tables[SearchMode.EXPECTIMINIMAX]
+	key = state.zobrist()
+	hit, first = tt_lookup(table, key, depth, alpha, beta)
+	if hit != None:
+		return hit
+	if stats != None: stats.nodes += 1
+
+	value, best_move = -float('inf'), None
+	for k in order_moves(state, state.player_moves(), first or state.player.facing):
+		state.apply_player(k)
+		scr = ghost_layer(state, adversarial_ghosts(state, depth), 0, depth, max(alpha, value), beta)
+		state.undo()
+		if scr > value:
+			value, best_move = scr, k
+		if value > beta:
+			if stats != None: stats.prunes += 1
+			break
+
+	tt_store(table, key, depth, value, alpha, beta, best_move)
+	return value
+
+
+def ghost_layer(
+	state: MState,
+	ghosts: list[str],
+	i: int,
+	depth: int,
+	alpha: float,
+	beta: float
+) -> float:
+	"""
+	Branch on ghost `ghosts[i]`: a min node while it is hostile, a uniform
+	chance node while it is frightened. Once every listed ghost has moved,
+	the remaining ghosts take their scripted step and the next max layer is
+	searched.
+	"""
+	if state.terminal() != TerminalState.ALIVE:
+		return evaluate(state)
+
+	if i == len(ghosts):
+		state.apply_ghosts(skip=ghosts)
+		value = expectiminimax(state, depth-1, alpha, beta)
+		state.undo()
+		return value
+
+	name = ghosts[i]
+	moves = ghost_moves(state, name)
+	if stats != None: stats.nodes += 1
+
+	if state.ghosts[name].state == GhostMode.FRIGHTENED:
+		# chance node; children are averaged so no bound can be passed down
+		total = 0
+		for tile in moves:
+			state.apply_ghost(name, tile)
+			total += ghost_layer(state, ghosts, i+1, depth, -float('inf'), float('inf'))
+			state.undo()
+		return total/len(moves)
+
+	value = float('inf')
+	for tile in moves:
+		state.apply_ghost(name, tile)
+		value = min(ghost_layer(state, ghosts, i+1, depth, alpha, min(beta, value)), value)
+		state.undo()
+		if value < alpha:
+			if stats != None: stats.prunes += 1
+			break
 
 	return value
 
 
+def reverse_penalty(score: float) -> float:
+	"""Score of a root move that makes Pac Man turn around."""
+	return score - abs(score)/2
+
+def reverse_penalty_inverse(score: float) -> float:
+	"""Inverse of `reverse_penalty` (it is strictly increasing)."""
+	return 2*score if score >= 0 else score/1.5
+
+
+def search_root_move(
+	st: MState,
+	k: str,
+	depth: int,
+	mode: SearchMode,
+	alpha: float = -float('inf')
+) -> float:
+	"""
+	Score of root move `k` of `st`, searched to `depth` plies. With
+	`SearchMode.EXPECTIMINIMAX`, `alpha` is the best root score so far; a
+	move that can't beat it is pruned.
+	"""
+	opposite_dir = OPPOSITE_DIR[st.player.facing]
+	if mode == SearchMode.EXPECTIMINIMAX:
+		if k == opposite_dir and alpha != -float('inf'):
+			alpha = reverse_penalty_inverse(alpha)
+		# ghosts answer each root move in their own layers
+		st.apply_player(k)
+		scr = ghost_layer(st, adversarial_ghosts(st, depth), 0, depth+1, alpha, float('inf'))
+	elif mode == SearchMode.TT_MINIMAX:
+		st.apply(k)
+		scr = tt_minimax(st, depth)
+	else:
+		st.apply(k)
+		scr = minimax_batched(st, depth)
+	st.undo()
+	if k == opposite_dir:
+		scr = reverse_penalty(scr)
+	return scr
+
+
+def search_root(
+	st: MState,
+	depth: int,
+	mode: SearchMode,
+	first: str = None
+) -> tuple[float, str]:
+	"""
+	Score every root move of `st` to `depth` plies and return the best as
+	(score, direction). Direction is None if every move loses.
+
+	With `SearchMode.EXPECTIMINIMAX`, root moves are searched best-first
+	(`first`, then `order_moves`) and pruned against the best score so far,
+	and nearby ghosts answer every move (see `ghost_layer`) instead of
+	following their scripts.
+	"""
+	if st.terminal() != TerminalState.ALIVE:
+		# nothing left to decide
+		return (evaluate(st), None)
+
+	moves = st.player_moves()
+
+	best = (-float('inf'), None) # (score: int, direction: str)
+	if mode == SearchMode.EXPECTIMINIMAX:
+		for k in order_moves(st, moves, first):
+			scr = search_root_move(st, k, depth, mode, best[0])
+			# ties go to the move plain minimax would have seen first
+			if scr > best[0] or (scr == best[0] and best[1] != None and\
+				moves.index(k) < moves.index(best[1])):
+				best = (scr, k)
+	else:
+		for k in moves:
+			scr = search_root_move(st, k, depth, mode)
+			if scr > best[0]:
+				best = (scr, k)
+
+	return best
+
+
+def search_packed_move(
+	packed: tuple,
+	k: str,
+	depth: int,
+	mode_value: int,
+	deadline_at: float,
+	with_stats: bool = False
+) -> tuple[str, float, tuple]:
+	"""
+	Worker side of `search_root_parallel`: `search_root_move` on a state
+	from `MState.pack`, against the pool's shared bound. Returns (`k`,
+	score, counts), with score None if `deadline_at` passed first, and
+	counts the worker's `SearchStats.counts()` if `with_stats` (else None).
+	"""
+	global deadline
+	st = MState.unpack(packed)
+	mode = SearchMode(mode_value)
+	if mode in transposition_tables:
+		transposition_tables[mode].new_search()
+	enable_stats(with_stats)
+
+	deadline = deadline_at
+	try:
+		scr = search_root_move(st, k, depth, mode, parallel.read_bound())
+	except SearchTimeout:
+		scr = None
+	finally:
+		deadline = None
+	if scr != None: parallel.raise_bound(scr)
+	return (k, scr, stats.counts() if stats != None else None)
+
+
+def search_root_parallel(
+	st: MState,
+	depth: int,
+	mode: SearchMode,
+	first: str = None,
+	workers: int = 4
+) -> tuple[float, str]:
+	"""
+	`search_root`, with each root move searched by its own worker process
+	(see `parallel.RootPool`). Picks the same move as `search_root`.
+
+	Raises `SearchTimeout` if any worker ran out of time, or as soon as
+	the workers have stopped after `abort_search`. `deadline` is shared
+	with the workers as a `time.perf_counter()` value, which is
+	system-wide.
+	"""
+	if st.terminal() != TerminalState.ALIVE:
+		return (evaluate(st), None)
+
+	moves = st.player_moves()
+	if mode == SearchMode.EXPECTIMINIMAX:
+		order = order_moves(st, moves, first)
+	else:
+		order = moves
+
+	packed = st.pack()
+	results = parallel.get_pool(workers).map(
+		search_packed_move,
+		[(packed, k, depth, mode.value, deadline, stats != None) for k in order],
+		cancelled=lambda: abort_requested
+	)
+	if results == None: raise SearchTimeout()
+	if stats != None:
+		for _, _, counts in results:
+			stats.add_counts(counts)
+
+	best = (-float('inf'), None)
+	for k, scr, _ in results:
+		if scr == None: raise SearchTimeout()
+		if scr > best[0] or (scr == best[0] and best[1] != None and\
+			moves.index(k) < moves.index(best[1])):
+			best = (scr, k)
+
+	return best
+
+
 def next_move(
-	play,
-	depth=1
+	game,
+	depth=1,
+	mode: SearchMode = SearchMode.MINIMAX,
+	time_budget_ms: float = None,
+	workers: int = None
 ) -> str:
 	"""
-	Use the minimax algorithm to determine best direction to travel in.
+	Use the minimax algorithm to determine best direction to travel in from
+	the current position of `game` (a `sim.simulation.Simulation`).
 	Returns one of "up", "down", "left", or "right"
-	"""
 
-	print('---------------')
+	See `choose_move` for the parameters.
+	"""
 	st = MState(
-		player=MPlayer(play.player.tile, play.player.facing),
-		maze=play.maze.maze,
-		ghosts=play.ghosts,
-		remaining_pellets=play.maze.remaining_pellets
+		player=MPlayer(game.player.tile, game.player.facing),
+		maze=game.maze.maze,
+		ghosts=game.ghosts,
+		rng=game.rng.stream('ai')
 	)
-	print(st)
-	opposite_dir = OPPOSITE_DIR[play.player.facing]
+	return choose_move(st, depth, mode, time_budget_ms, workers)
 
-	best = (-float('inf'), None) # (score: int, direction: str)
-	possible_states = explore_states(st)
-	for k, v in possible_states.items():
-		scr = minimax(v, depth)
-		if k == opposite_dir:
-			scr -= abs(scr)/2
-		print(f'{k}={scr}\n')
-		if scr > best[0]:
-			best = (scr, k)
-	print()
+
+def choose_move(
+	st: MState,
+	depth=1,
+	mode: SearchMode = SearchMode.MINIMAX,
+	time_budget_ms: float = None,
+	workers: int = None
+) -> str:
+	"""
+	Best direction for Pac Man to travel in from `st`.
+
+	If `time_budget_ms` is given, `depth` is ignored: the search deepens one
+	ply at a time (each iteration seeded with the previous one's best move)
+	until the budget runs out, and the best move of the deepest completed
+	iteration is returned. Depth 1 always completes, unless `abort_search`
+	is called.
+
+	If `workers` is more than 1, each root move is searched in its own
+	process (see `search_root_parallel`).
+	"""
+	global prev_best_move, deadline
+
+	if stats != None: stats.begin_decision(time.perf_counter())
+	if mode in transposition_tables:
+		transposition_tables[mode].new_search()
+
+	if workers != None and workers > 1:
+		root = lambda d, first: search_root_parallel(st, d, mode, first, workers)
+	else:
+		root = lambda d, first: search_root(st, d, mode, first)
+
+	if time_budget_ms == None:
+		best = root(depth, prev_best_move)
+		completed = depth
+	else:
+		start = time.perf_counter()
+		best = root(1, prev_best_move)
+		completed = 1
+		deadline = start + time_budget_ms/1000
+		try:
+			for d in range(2, MAX_DEPTH+1):
+				# a forced win or loss won't change with more depth
+				if best[1] == None or best[0] == float('inf'): break
+				best = root(d, best[1])
+				completed = d
+		except SearchTimeout:
+			st.undo_all()
+		finally:
+			deadline = None
 	
 	if best[1] == None:
-		best = (-float('inf'), random.choice(list(possible_states.keys())))
+		rng = st.rng if st.rng != None else random
+		best = (-float('inf'), rng.choice(st.player_moves()))
 
-	print(f'{best[1]}\n')
+	prev_best_move = best[1]
+	if stats != None: stats.end_decision(time.perf_counter(), completed)
 	return best[1]
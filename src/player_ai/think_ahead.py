@@ -0,0 +1,141 @@
+import threading
+import time
+
+from .model import MState, MPlayer, MGhost
+from . import player_ai as ai
+
+def predict_arrival(game) -> MState:
+	"""
+	AI-model state for when Pac Man reaches `game.player.tile_next`: he's
+	on that tile, still facing the same way, and each ghost has moved on to
+	its own `tile_next` if it gets there first.
+	"""
+	player = game.player
+	arrival = (1 - player.tile_progress)/game.player_speed
+
+	st = MState(player=MPlayer(player.tile_next, player.facing), maze=game.maze.maze, ghosts=[], rng=game.rng.stream('ai'))
+	for g in game.ghosts:
+		tile = g.tile
+		if g.tile_next != None and (1 - g.tile_progress)/g.speed() <= arrival:
+			tile = g.tile_next
+		st.ghosts[g.name] = MGhost.from_fields(g.name, tile, g.facing, g.mode)
+	return st
+
+class ThinkAhead:
+	"""
+	Controller for `Simulation` that decides Pac Man's next turn on a
+	background thread while he is still walking there.
+
+	Use it as both the simulation's `planner` and its `controller`. As a
+	planner it hands the thread a search from `predict_arrival` as soon as
+	Pac Man commits to a tile, aborting the search it was still busy with.
+	As a controller it hands over that search's move on arrival, or keeps
+	him going straight if the search hasn't finished. Neither waits for the
+	thread, so a slow search never holds up a frame.
+
+	If `realtime` is set, the search gets the wall-clock time Pac Man needs
+	to arrive (`Simulation.TICK_TIME` per tick, sped up by `time_scale`)
+	minus `reserve_ms`. Otherwise it searches to `depth` and arrival waits
+	for it, which keeps headless games deterministic.
+	"""
+	def __init__(
+		self,
+		mode: ai.SearchMode = ai.SearchMode.TT_MINIMAX,
+		depth: int = 1,
+		realtime: bool = True,
+		reserve_ms: float = 4,
+		workers: int = None,
+		time_scale: float = 1.0
+	):
+		self.mode = mode
+		self.depth = depth
+		self.realtime = realtime
+		self.reserve_ms = reserve_ms
+		self.workers = workers
+		self.time_scale = time_scale
+		"""Game seconds per wall-clock second (see `Play`)."""
+
+		self.lock = threading.Condition()
+		"""Guards everything below; notified whenever the thread goes idle or
+		a result comes in."""
+		self.thread: threading.Thread = None
+		self.jobs = 0
+		"""Searches asked for so far; the latest one's number."""
+		self.job: tuple[int, MState, tuple[int, int], float, float] = None
+		"""(number, state, tile, budget_ms, time asked for) of the search
+		waiting to start."""
+		self.busy = False
+		"""Whether the thread is searching."""
+		self.closing = False
+		self.result: tuple[int, tuple[int, int], str] = None
+		"""(number, tile, direction) of the last finished search."""
+
+	def __call__(self, game) -> str:
+		with self.lock:
+			if not self.realtime:
+				while self.job != None or self.busy:
+					self.lock.wait()
+			result = self.result
+			latest = self.jobs
+		if result != None and result[0] == latest and result[1] == tuple(game.player.tile):
+			return result[2]
+		return game.player.facing
+
+	def plan(self, game):
+		"""Start deciding what to do at `game.player.tile_next`."""
+		st = predict_arrival(game)
+		tile = tuple(game.player.tile_next)
+
+		budget_ms = None
+		if self.realtime:
+			ticks = (1 - game.player.tile_progress)/(game.player_speed*game.TICK_TIME)
+			budget_ms = max(1, ticks*game.TICK_TIME*1000/self.time_scale - self.reserve_ms)
+
+		with self.lock:
+			if self.thread == None:
+				self.thread = threading.Thread(target=self.serve, daemon=True)
+				self.thread.start()
+			if self.busy:
+				ai.abort_search() # stale; the thread moves on once it stops
+			self.jobs += 1
+			self.job = (self.jobs, st, tile, budget_ms, time.perf_counter())
+			self.lock.notify_all()
+
+	def serve(self):
+		"""The thread: run the latest search asked for, until `stop`."""
+		while True:
+			with self.lock:
+				ai.abort_search(False)
+				self.busy = False
+				self.lock.notify_all()
+				while self.job == None and not self.closing:
+					self.lock.wait()
+				if self.closing: return
+				number, st, tile, budget_ms, asked = self.job
+				self.job = None
+				self.busy = True
+
+			if budget_ms != None:
+				# the time since `plan` came out of the budget already
+				budget_ms = max(1, budget_ms - (time.perf_counter() - asked)*1000)
+
+			try:
+				move = ai.choose_move(st, self.depth, self.mode, budget_ms, self.workers)
+			except ai.SearchTimeout:
+				continue # aborted
+			with self.lock:
+				self.result = (number, tile, move)
+
+	def stop(self):
+		"""Abort the search in progress, if any, and end the thread. Waits
+		for it, so call it between games rather than during one."""
+		with self.lock:
+			if self.thread == None: return
+			self.closing = True
+			self.job = None
+			if self.busy: ai.abort_search()
+			self.lock.notify_all()
+		self.thread.join()
+		ai.abort_search(False)
+		self.thread = None
+		self.closing = False
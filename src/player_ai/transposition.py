@@ -0,0 +1,53 @@
+from enum import Enum
+
+class Bound(Enum):
+	EXACT = 0
+	LOWER = 1
+	"""Search failed high; the true score is at least `value`."""
+	UPPER = 2
+	"""Search failed low; the true score is at most `value`."""
+
+class TTEntry:
+	__slots__ = ('key', 'depth', 'value', 'bound', 'best_move', 'generation')
+
+	def __init__(self, key: int, depth: int, value: float, bound: Bound, best_move: str, generation: int):
+		self.key = key
+		self.depth = depth
+		self.value = value
+		self.bound = bound
+		self.best_move = best_move
+		self.generation = generation
+
+class TranspositionTable:
+	"""
+	Fixed-size table of search results keyed by `MState.zobrist()`.
+
+	Each key maps to one slot. On a collision the stored entry is kept only
+	if it was searched deeper and belongs to the current generation (the
+	current `next_move` call); results from earlier ticks are always
+	replaceable, but stay usable until something overwrites them.
+	"""
+	def __init__(self, size: int = 1 << 18):
+		self.size = size
+		self.slots: list[TTEntry] = [None]*size
+		self.generation = 0
+
+	def new_search(self):
+		"""Call once per `next_move`; ages every stored entry."""
+		self.generation += 1
+
+	def probe(self, key: int) -> TTEntry:
+		entry = self.slots[key % self.size]
+		if entry != None and entry.key == key:
+			return entry
+		return None
+
+	def store(self, key: int, depth: int, value: float, bound: Bound, best_move: str):
+		idx = key % self.size
+		entry = self.slots[idx]
+		if entry != None and entry.generation == self.generation and entry.depth > depth:
+			return
+		self.slots[idx] = TTEntry(key, depth, value, bound, best_move, self.generation)
+
+	def clear(self):
+		self.slots = [None]*self.size
@@ -0,0 +1,111 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+class FrameProfiler:
+    """
+    Times each phase of every frame.
+
+    A frame starts with `begin_frame`; each `lap(name)` then charges the
+    time since the previous lap (or the frame's start) to `name`. A phase
+    lapped several times in one frame (once per simulation tick, say) adds
+    up. Per-phase totals of the last `window` frames give rolling
+    percentiles, and the last `trace_frames` frames can be written out as a
+    Chrome trace (chrome://tracing, Perfetto).
+    """
+
+    def __init__(self, window: int = 600, trace_frames: int = 3600):
+        self.window = window
+        self.frame_times: dict[str, deque] = {}
+        """Per-phase time of the last `window` frames, in ms."""
+        self.trace: deque = deque(maxlen=trace_frames)
+        """(frame start, [(phase, start, end)...]) per frame, in seconds."""
+        self.frames = 0
+        self.origin = time.perf_counter()
+        self.frame_start: float = None
+        self.last: float = None
+        self.laps: list[tuple[str, float, float]] = None
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        self.frame_start = self.last = now
+        self.laps = []
+
+    def lap(self, name: str):
+        """Charge the time since the last lap to `name`."""
+        if self.laps == None: return
+        now = time.perf_counter()
+        self.laps.append((name, self.last, now))
+        self.last = now
+
+    def end_frame(self):
+        if self.laps == None: return
+        now = time.perf_counter()
+        totals = {'frame': now - self.frame_start}
+        for name, start, end in self.laps:
+            totals[name] = totals.get(name, 0.0) + end - start
+        for name, total in totals.items():
+            if name not in self.frame_times:
+                self.frame_times[name] = deque(maxlen=self.window)
+            self.frame_times[name].append(total*1000)
+        self.trace.append((self.frame_start, now, self.laps))
+        self.frames += 1
+        self.laps = None
+
+    def percentiles(self, ps: tuple = (50, 95, 99)) -> dict[str, dict[str, float]]:
+        """Per phase, the given percentiles and the max of its time per frame
+        (ms) over the window. Phases that didn't run in a frame are left out
+        of that frame."""
+        ret = {}
+        for name, times in self.frame_times.items():
+            ordered = sorted(times)
+            row = {f'p{p}': ordered[min(len(ordered) - 1, int(p/100*len(ordered)))] for p in ps}
+            row['max'] = ordered[-1]
+            ret[name] = row
+        return ret
+
+    def report(self) -> str:
+        """`percentiles` as a table, slowest phases first."""
+        rows = sorted(self.percentiles().items(), key=lambda kv: -kv[1]['p95'])
+        lines = [f'{"phase":<20}{"p50":>9}{"p95":>9}{"p99":>9}{"max":>9}  (ms, last {self.window} frames)']
+        for name, row in rows:
+            lines.append(f'{name:<20}' + ''.join(f'{row[k]:>9.2f}' for k in ['p50', 'p95', 'p99', 'max']))
+        return '\n'.join(lines)
+
+    def trace_events(self) -> list[dict]:
+        pid, tid = os.getpid(), threading.get_ident()
+        us = lambda t: (t - self.origin)*1e6
+        events = []
+        for start, end, laps in self.trace:
+            events.append({'name': 'frame', 'ph': 'X', 'ts': us(start), 'dur': us(end) - us(start), 'pid': pid, 'tid': tid})
+            for name, lap_start, lap_end in laps:
+                events.append({'name': name, 'ph': 'X', 'ts': us(lap_start), 'dur': us(lap_end) - us(lap_start), 'pid': pid, 'tid': tid})
+        return events
+
+    def write_trace(self, path: str):
+        """Write the traced frames as Chrome trace JSON to `path`."""
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms'}, f)
+
+active: FrameProfiler = None
+"""The running profiler, if any; `lap` does nothing without one."""
+
+def enable(**kwargs) -> FrameProfiler:
+    global active
+    active = FrameProfiler(**kwargs)
+    return active
+
+def disable():
+    global active
+    active = None
+
+def begin_frame():
+    if active != None: active.begin_frame()
+
+def lap(name: str):
+    if active != None: active.lap(name)
+
+def end_frame():
+    if active != None: active.end_frame()
@@ -0,0 +1,51 @@
+"""Play recorded games back headlessly and check they still replay.
+
+    python replay.py ../replays/*.pmr
+    python replay.py game.pmr --seek 5000
+
+Each replay is re-simulated to its end (or to `--seek`), as fast as the
+simulation goes, and checked against the state it recorded. Exits with
+status 1 if any replay no longer matches, e.g. after a rules change."""
+import argparse
+import sys
+import time
+
+from maze_distance import MazeDistances
+from sim.replay import Replay, ReplayPlayer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('replays', nargs='+', metavar='REPLAY')
+    parser.add_argument('--seek', type=int, help='stop at this tick and show the game there')
+    parser.add_argument('--keyframe-interval', type=int, default=ReplayPlayer.KEYFRAME_INTERVAL)
+    args = parser.parse_args(argv)
+
+    MazeDistances.get()
+    out_of_sync = 0
+    for path in args.replays:
+        replay = Replay.load(path)
+        size = len(replay.encode())
+        print(f'{path}: seed {replay.seed}, {replay.ticks} ticks, score {replay.score}, '
+            f'{len(replay.turns)} turns in {size} bytes')
+
+        start = time.perf_counter()
+        player = ReplayPlayer(replay, args.keyframe_interval)
+        if args.seek != None:
+            game = player.seek(args.seek)
+            print(f'  tick {game.ticks}: phase {game.phase}, score {game.score}, level {game.play_state.level}, '
+                f'lives {game.player.lives}, pac man at {game.player.tile} facing {game.player.facing}')
+            continue
+
+        in_sync = player.in_sync()
+        elapsed = time.perf_counter() - start
+        print(f'  {"ok" if in_sync else "OUT OF SYNC"}: replayed at {player.game.ticks/elapsed:.0f} ticks/s')
+        out_of_sync += not in_sync
+
+    if out_of_sync > 0:
+        print(f'{out_of_sync} replay(s) out of sync', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
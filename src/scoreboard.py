@@ -1,12 +1,27 @@
 import pygame as pg
+from pygame import Surface
 import application as app
+import assets
 
-class Scoreboard():
-    dot_food_points = 10
-    power_pellet_points = 50
-    bonus_fruit = 100
-    ghost_points = 200
+class DigitGlyphs:
+    """Digits pre-rendered in one font and color, for drawing numbers
+    without rasterizing text each time."""
+    def __init__(self, font: pg.font.Font, color):
+        self.glyphs = [font.render(str(d), True, color) for d in range(10)]
+        self.height = font.get_height()
+
+    def render(self, value: int) -> Surface:
+        """`value` as one surface, like `font.render(str(value), True, color)`."""
+        digits = [self.glyphs[int(c)] for c in str(value)]
+        surface = Surface((sum(g.get_width() for g in digits), self.height), pg.SRCALPHA)
+        x = 0
+        for g in digits:
+            # glyphs never overlap, so adding onto the blank surface copies them exactly
+            surface.blit(g, (x, 0), special_flags=pg.BLEND_RGBA_ADD)
+            x += g.get_width()
+        return surface
 
+class Scoreboard():
     def __init__(self, play): # game is an instance of application class/game
         # what is settings in this case if we compare with the space invaders ?
         self.score = 0
@@ -16,7 +31,10 @@ class Scoreboard():
         self.screen = play.screen # accessing application screen variable ?
         self.screen_rect = self.screen.get_rect() 
         self.text_color = (255, 255, 255) # white color
-        self.font = pg.font.Font(f'{app.Application.PROJECT_DIR}/resources/fonts/Press Start 2P.ttf', 24)
+        self.font = assets.font(24)
+        self.digits = DigitGlyphs(self.font, self.text_color)
+        self.drawn_values = None
+        """(score, high score) as last rendered."""
         
         self.score_header = self.font.render("SCORE", True, self.text_color)
         self.score_header_rect = self.score_header.get_rect()
@@ -46,29 +64,19 @@ class Scoreboard():
         self.prep_score_graphics()
 
 
-    def increment_points_power_pellet(self):
-        self.score = self.score + Scoreboard.power_pellet_points
-        self.prep_score_graphics()
-
-    def increment_points_ghost(self):
-        self.score = self.score + Scoreboard.ghost_points
-        self.prep_score_graphics()
-
-    def increment_points_dot(self):
-        self.score = self.score + Scoreboard.dot_food_points
-        self.prep_score_graphics()
-    def increment_points_fruit(self):
-        self.score = self.score + Scoreboard.bonus_fruit
+    def set_score(self, score: int):
+        """Show `score`; graphics are only rebuilt when it changes."""
+        if score == self.score: return
+        self.score = score
         self.prep_score_graphics()
-    
-
 
     def prep_score_graphics(self):
+        if self.drawn_values == (self.score, self.high_score): return
+        self.drawn_values = (self.score, self.high_score)
+
         # graphics prep
-        score_str = str(self.score)
-        high_score_str = str(self.high_score)
-        self.score_image = self.font.render(score_str, True, self.text_color)
-        self.high_score_image = self.font.render(high_score_str, True, self.text_color)
+        self.score_image = self.digits.render(self.score)
+        self.high_score_image = self.digits.render(self.high_score)
 
         # rects prep
         self.score_rect = self.score_image.get_rect()
@@ -86,10 +94,11 @@ class Scoreboard():
         self.update()
 
     def draw(self):
-        self.screen.blit(self.score_header, self.score_header_rect)
-        self.screen.blit(self.high_score_header, self.high_score_header_rect)
-        self.screen.blit(self.score_image, self.score_rect)
-        self.screen.blit(self.high_score_image, self.high_score_rect)
+        mark = self.play.mark_drawn
+        mark(self.screen.blit(self.score_header, self.score_header_rect))
+        mark(self.screen.blit(self.high_score_header, self.high_score_header_rect))
+        mark(self.screen.blit(self.score_image, self.score_rect))
+        mark(self.screen.blit(self.high_score_image, self.high_score_rect))
 
     def update(self):
         self.prep_score_graphics()
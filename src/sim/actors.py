@@ -0,0 +1,350 @@
+from ghost_ai import \
+    GhostMode, get_next_move_tile, get_target_tile_inky, get_target_tile_blinky,\
+    get_target_tile_clyde, get_target_tile_pinky, OPPOSITE_DIR
+from util import get_facing, lerp, tile_add
+
+class PlayerState:
+    """Pac Man's position, movement and death sequence. No pygame."""
+    DIR_VECTOR = {
+        'up': (0, -1),
+        'left': (-1, 0),
+        'down': (0, 1),
+        'right': (1, 0)
+    }
+
+    SPAWN_TILE = (12, 17)
+
+    def __init__(self, game):
+        self.game = game
+        self.maze = game.maze
+
+        self.lives = 3
+        """The player's remaining lives."""
+
+        self.tile = (12, 17)
+        """The player's last \"steady\" tile."""
+
+        self.tile_next = (13, 17)
+        """The immediate tile for the player to move towards. Should be adjacent to `self.tile`."""
+
+        self.tile_progress = 0
+        """Player's progress of movement between `self.tile`` and `self.next_tile`.
+        Should range 0 to 1 inclusive."""
+
+        self.hit = False
+
+        self.death_phase = -1
+        """Phase of Pac Man's death.
+        
+        -1: alive
+        0: just got hit; action pause w/ pac man and ghosts visible
+        1: action pause w/ just pac man visible
+        2: animation running
+        3: finally dead"""
+
+        self.facing = ''
+        self.update_facing()
+        self.game.consume_tile(self.tile)
+
+    def position(self) -> tuple[float, float]:
+        """Where Pac Man is between `self.tile` and `self.tile_next`, in tiles."""
+        return (
+            lerp(self.tile[0], self.tile_next[0], self.tile_progress),
+            lerp(self.tile[1], self.tile_next[1], self.tile_progress)
+        )
+
+    def ghost_interact(self, ghost):
+        # eaten; do nothing
+        if ghost.mode in [GhostMode.EATEN, GhostMode.EATEN_INVISIBLE]: return
+
+        if ghost.mode == GhostMode.FRIGHTENED: # frightened
+            ghost.mode = GhostMode.EATEN_INVISIBLE
+            self.game.play_state.action_pause(50)
+            self.game.emit('eat_ghost')
+            self.game.score += self.game.GHOST_POINTS
+        else: # hostile in all its forms
+            self.got_hit()
+        
+        self.game.emit('stop_chomping')
+
+    def got_hit(self):
+        """When Pac Man is hit by a ghost."""
+        self.hit = True
+
+    def update_facing(self):
+        """Update `self.facing` based on `self.tile` and `self.tile_next`."""
+        diff = (self.tile_next[0] - self.tile[0], self.tile_next[1] - self.tile[1])
+        if diff == (0,0): return
+        if diff[0] != 0: # horizontal movement
+            self.facing = 'left' if diff[0] < 0 else 'right'
+        else: # vertical movement
+            self.facing = 'down' if diff[1] > 0 else 'up'
+        
+    def teleport(self, tile: tuple[int, int]):
+        """Teleport Pac Man to a particular tile."""
+        self.tile = tile
+        self.tile_next = tile
+        self.tile_next = self.get_facing_tile()
+        self.tile_progress = 0
+    
+    def reset(self):
+        """Runs after death animation is finished."""
+        self.tile = PlayerState.SPAWN_TILE
+        self.tile_next = PlayerState.SPAWN_TILE
+        self.tile_progress = 0
+        self.facing = 'right'
+        self.update_tile_next()
+        self.hit = False
+        self.death_phase = -1
+
+    def get_facing_tile(self, direction:str=None):
+        if direction == None:
+            vec = PlayerState.DIR_VECTOR[self.facing]
+        else:
+            vec = PlayerState.DIR_VECTOR[direction]     
+        return tile_add(self.tile_next, vec)
+
+    def update_tile_next(self):
+        """Determine the next intermediate tile to go to. Should only run when we've reached target tile (self.tile_progress >= 1)"""
+        self.tile = self.tile_next
+        tile_check = self.get_facing_tile()
+        tile_state = self.maze.tile_state(*tile_check)
+        if tile_state not in [-1, 0, 4]:
+            self.tile_next = tile_check
+
+    def try_set_direction(self, direction: str) -> bool:
+        """Face `direction` if it's open and he's nearly at his next tile.
+        Returns whether he turned."""
+        if direction == None or direction == self.facing: return False
+        if self.tile_progress >= 0.8:
+            state = self.maze.tile_state(*self.get_facing_tile(direction))
+            if state not in [-1, 0, 4]:
+                self.facing = direction
+                return True
+        return False
+
+    def move(self):
+        self.tile_progress += self.game.player_speed*self.game.TICK_TIME
+        if self.tile_progress >= 1:
+            self.tile = (self.tile_next[0], self.tile_next[1])
+            if self.game.controller != None:
+                direction = self.game.controller(self.game)
+                if self.try_set_direction(direction) and self.game.recorder != None:
+                    self.game.recorder.turn(direction, arrival=True)
+            self.tile_progress %= 1
+            self.game.consume_tile(self.tile)
+            self.update_tile_next()
+            self.update_facing()
+            if self.game.planner != None:
+                self.game.planner(self.game)
+
+    def dying(self):
+        play_state = self.game.play_state
+        if self.death_phase == -1: # just got hit
+            self.game.emit('stop_all')
+            play_state.action_pause(60)
+            self.death_phase = 0
+        if self.death_phase == 0:
+            if not play_state.is_action_pausing:
+                play_state.hide_ghosts = True
+                play_state.action_pause(30)
+                self.death_phase = 1
+        if self.death_phase == 1: # action pause w/ ghosts hidden
+            if not play_state.is_action_pausing:
+                self.game.emit('music_death')
+                play_state.action_pause(60*2)
+                self.death_phase = 2
+        if self.death_phase == 2:
+            if not play_state.is_action_pausing:
+                self.lives -= 1
+                self.game.reset()
+
+    def update(self):
+        if self.hit:
+            self.dying()
+        self.move()
+
+
+class GhostState:
+    """Base class for the ghosts' movement and modes. Should not be instantiated!"""
+    FRIGHTENED_SPEED = 3
+    EATEN_SPEED = 20
+
+    def __init__(
+        self,
+        name: str,
+        tile_start: tuple[int, int],
+        tile_scatter: tuple[int, int],
+        game
+    ):
+        self.name = name
+        self.game = game
+        self.maze = game.maze
+        self.pacman = game.player
+        
+        self.tile_start = tile_start
+        """The tile to spawn on at the very beginning of a game."""
+
+        self.tile = tile_start
+        """The ghost's last \"steady\" tile."""
+
+        self.tile_next = None
+        """The immediate tile for the ghost to move towards. Should be adjacent to `self.tile`."""
+
+        self.tile_scatter = tile_scatter
+        """The tile that the ghost will target during scatter mode."""
+
+        self.target = tile_scatter
+        """The tile that the ghost will ultimately be working towards."""
+
+        self.tile_progress = 1
+        """Ghost's progress of movement between `self.tile`` and `self.next_tile`.
+        Should range 0 to 1 inclusive."""
+
+        self.facing = 'right'
+        """Which way the ghost is currently facing."""
+
+        self.mode: GhostMode = GhostMode.SCATTER
+        """The ghost's current behavior mode. Refer to the `GhostMode` enum."""
+
+        self.rng = game.rng.stream(name)
+        """This ghost's own random stream, for its frightened wandering."""
+
+        self.update_next_tile()
+        self.update_facing()
+
+    def reset(self):
+        self.mode = GhostMode.SCATTER
+        self.tile = self.tile_start
+        self.tile_next = None
+        self.tile_progress = 1
+        self.facing = 'right'
+        self.target = self.tile_scatter
+        self.update_next_tile()
+        self.update_facing()
+
+    def position(self) -> tuple[float, float]:
+        """Where the ghost is between `self.tile` and `self.tile_next`, in tiles."""
+        return (
+            lerp(self.tile[0], self.tile_next[0], self.tile_progress),
+            lerp(self.tile[1], self.tile_next[1], self.tile_progress)
+        )
+
+    def set_mode(self, mode):
+        if self.mode not in [GhostMode.EATEN, GhostMode.EATEN_INVISIBLE, GhostMode.GHOST_HOUSE_INSIDE, GhostMode.GHOST_HOUSE_JOINING, GhostMode.GHOST_HOUSE_LEAVING]:
+            self.mode = mode
+            self.flip()
+
+    def update_chase_target(self) -> None:
+        """OVERRIDE: Set the next target tile. Should only modify `self.target`!"""
+        pass
+
+    def update_next_tile(self):
+        """Sets `self.next_tile` based on `self.target`."""
+        self.tile_next = get_next_move_tile(
+            from_tile=self.tile,
+            target_tile=self.target,
+            facing=self.facing,
+            cur_mode=self.mode,
+            rng=self.rng
+        )
+    
+    def update_facing(self):
+        """Update `self.facing` based on `self.tile` and `self.tile_next`."""
+        self.facing = get_facing(self.tile, self.tile_next)
+
+    def move(self):
+        """Calculate target tile (if needed) and move towards it.
+        Updates `self.facing` and `self.tile_next`."""
+
+        # When next_tile is reached, update target and next_tile
+        if self.tile_progress >= 1:
+            self.tile_progress %= 1
+            self.tile = (self.tile_next[0], self.tile_next[1])
+
+            # determine target
+            if self.mode == GhostMode.SCATTER:
+                # scatter
+                self.target = self.tile_scatter
+            elif self.mode == GhostMode.CHASE:
+                # chase
+                self.update_chase_target()
+            elif self.mode == GhostMode.EATEN:
+                self.target = (13, 11)
+                if self.tile == (13, 11):
+                    self.mode = GhostMode.GHOST_HOUSE_JOINING
+            # moving in/out the ghost house
+            if self.mode == GhostMode.GHOST_HOUSE_JOINING:
+                self.target = (13, 14)
+                if self.tile == (13, 14):
+                    self.mode = GhostMode.GHOST_HOUSE_LEAVING
+            if self.mode == GhostMode.GHOST_HOUSE_LEAVING:
+                self.target = (13, 11)
+                if self.tile == (13, 11):
+                    self.mode = self.game.play_state.mode_ghosts
+                    self.flip()
+
+            self.update_next_tile()
+            self.update_facing()
+        
+        # Move towards next_tile
+        self.tile_progress += self.speed()*self.game.TICK_TIME
+
+    def speed(self) -> float:
+        """Current movement speed, in tiles per second."""
+        if self.mode == GhostMode.FRIGHTENED:
+            return GhostState.FRIGHTENED_SPEED
+        elif self.mode == GhostMode.EATEN:
+            return GhostState.EATEN_SPEED
+        return self.game.ghosts_speed
+    
+    def flip(self):
+        """Flip our movement completely."""
+        self.facing = OPPOSITE_DIR[self.facing]
+        self.tile_next, self.tile = self.tile, self.tile_next
+        self.tile_progress = 1 - self.tile_progress
+
+    def update_mode(self):
+        if self.mode == GhostMode.EATEN_INVISIBLE: self.mode = GhostMode.EATEN
+
+    def update(self):
+        self.update_mode()
+        self.move()
+
+class BlinkyState(GhostState):
+    def __init__(self, game):
+        super().__init__(name='Blinky', tile_start=(18, 10), tile_scatter=(25, -4), game=game)
+    
+    def update_chase_target(self):
+        self.target = get_target_tile_blinky(self.pacman.tile)
+
+class PinkyState(GhostState):
+    def __init__(self, game):
+        super().__init__(name='Pinky', tile_start=(8, 11), tile_scatter=(2, -4), game=game)
+    
+    def update_chase_target(self):
+        self.target = get_target_tile_pinky(
+            player_tile=self.pacman.tile,
+            player_facing=self.pacman.facing
+        )
+
+class InkyState(GhostState):
+    def __init__(self, game):
+        super().__init__(name='Inky', tile_start=(18, 14), tile_scatter=(27, 31), game=game)
+    
+    def update_chase_target(self):
+        self.target = get_target_tile_inky(
+            player_tile=self.pacman.tile,
+            blinky_tile=self.game.ghosts[0].tile
+        )
+
+class ClydeState(GhostState):
+    def __init__(self, game):
+        super().__init__(name='Clyde', tile_start=(9, 14), tile_scatter=(0, 31), game=game)
+    
+    def update_chase_target(self):
+        self.target = get_target_tile_clyde(
+            player_tile=self.pacman.tile,
+            clyde_tile=self.tile,
+            scatter_target_tile=self.tile_scatter
+        )
@@ -0,0 +1,114 @@
+import math
+
+from vector import Vector
+
+TILE_STATE = {c: int(c) for c in '01234567'}
+"""Tile state per maze character, so lookups don't parse strings."""
+
+class MazeState:
+    """The maze's tiles and what's left to eat on them. No pygame."""
+
+    FRESH_MAZE = (
+        '0000000000000000000000000000'
+        '0222222222222002222222222220'
+        '0200002000002002000002000020'
+        '0300002000002002000002000030'
+        '0200002000002002000002000020'
+        '0222222222222222222222222220'
+        '0200002002000000002002000020'
+        '0200002002000000002002000020'
+        '0222222002222002222002222220'
+        '0000002000001001000002000000'
+        '0000002000001001000002000000'
+        '0000002001111111111002000000'
+        '0000002001000440001002000000'
+        '0000002001011111101002000000'
+        '1611112111011111101112111171'
+        '0000002001011111101002000000'
+        '0000002001000000001002000000'
+        '0000002001111151111002000000'
+        '0000002001000000001002000000'
+        '0000002001000000001002000000'
+        '0222222222222002222222222220'
+        '0200002000002002000002000020'
+        '0200002000002002000002000020'
+        '0322002222222112222222002230'
+        '0002002002000000002002002000'
+        '0002002002000000002002002000'
+        '0222222002222002222002222220'
+        '0200000000002002000000000020'
+        '0200000000002002000000000020'
+        '0222222222222222222222222220'
+        '0000000000000000000000000000'
+    )
+
+    WIDTH, HEIGHT = 28, 31
+    PORTAL_A_TILE = (1, 14)
+    PORTAL_B_TILE = (26, 14)
+    NUM_PELLETS = 244
+
+    @staticmethod
+    def tile2strpos(tile_vec: Vector):
+        """Converts a tile vector into its position in the maze string."""
+        x, y = math.floor(tile_vec.x), math.floor(tile_vec.y)
+        return x + MazeState.WIDTH*y
+
+    @staticmethod
+    def strpos(x: int, y: int) -> int:
+        """`tile2strpos` for integer tile coordinates."""
+        return x + MazeState.WIDTH*y
+
+    def __init__(self):
+        self.maze = list(MazeState.FRESH_MAZE)
+
+        self.remaining_pellets = MazeState.NUM_PELLETS
+        """Pellets left to eat before moving to the next level."""
+
+        self.revision = 0
+        """Bumped whenever a tile changes, so views know to redraw."""
+
+    def get_tile_state(self, tile_vec: Vector):
+        """Returns the state of a tile.
+
+        Possible return values:
+        -1: out of bounds
+        0: wall (non-traversable)
+        1: empty
+        2: food pellet
+        3: power pellet
+        4: ghost house entrance
+        5: bonus fruit
+        6: portal a
+        7: portal b"""
+        
+        if ((tile_vec.x < 0 or tile_vec.x >= MazeState.WIDTH) or\
+            (tile_vec.y < 0 or tile_vec.y >= MazeState.HEIGHT)):
+            return -1
+        strpos = MazeState.tile2strpos(tile_vec)
+        return TILE_STATE[self.maze[strpos]]
+
+    def tile_state(self, x: int, y: int) -> int:
+        """`get_tile_state` for integer tile coordinates, without building a `Vector`."""
+        if x < 0 or x >= MazeState.WIDTH or y < 0 or y >= MazeState.HEIGHT:
+            return -1
+        return TILE_STATE[self.maze[x + MazeState.WIDTH*y]]
+
+    def consume_tile(self, tile: tuple[int, int]) -> int:
+        """Eat whatever is on `tile`. Returns the tile's state from before;
+        the caller applies the game effects."""
+        state = self.tile_state(*tile)
+
+        if state in [2, 3]: # food/power pellet
+            self.maze[MazeState.strpos(*tile)] = '1'
+            self.remaining_pellets -= 1
+            self.revision += 1
+        elif state == 5: # bonus fruit
+            self.maze[MazeState.strpos(*tile)] = '1'
+            self.revision += 1
+
+        return state
+
+    def reset(self):
+        self.maze = list(MazeState.FRESH_MAZE)
+        self.remaining_pellets = MazeState.NUM_PELLETS
+        self.revision += 1
@@ -0,0 +1,206 @@
+import copy
+import os
+import struct
+import time
+import zlib
+
+from util import PROJECT_DIR
+from .simulation import Simulation
+
+REPLAY_DIR = os.path.join(PROJECT_DIR, 'replays')
+"""Where games are recorded to unless told otherwise."""
+
+DIRECTIONS = ('up', 'left', 'down', 'right')
+
+MAGIC = b'PMRP'
+VERSION = 1
+HEADER = struct.Struct('<4sBQIII')
+"""Magic, version, seed, ticks, score and the `state_digest` at the end."""
+
+DELTA_ESCAPE = 31
+"""Tick gaps this long or longer don't fit in a turn's byte; the rest of
+the gap follows it as a varint."""
+
+
+def state_digest(game: Simulation) -> int:
+    """CRC-32 of everything on the board, to tell whether a replay kept in
+    step with the game it recorded."""
+    board = (
+        game.ticks, game.phase, game.score, game.play_state.level,
+        game.player.lives, game.player.tile, game.player.facing, game.maze.maze,
+        [(g.name, g.tile, g.facing, g.mode.value) for g in game.ghosts]
+    )
+    return zlib.crc32(repr(board).encode())
+
+
+class Replay:
+    """
+    A recorded game: its seed and every turn Pac Man made.
+
+    Everything else in a `Simulation` follows from those, so a replay is a
+    few bytes of header plus about one byte per turn (see `encode`).
+    """
+
+    def __init__(self, seed: int, turns: list = None, ticks: int = 0, score: int = 0, digest: int = 0):
+        self.seed = seed
+        self.turns: list[tuple[int, str, bool]] = turns if turns != None else []
+        """(tick, direction, arrival) per turn, in order. Arrival turns
+        came from the controller when Pac Man reached a tile during that
+        tick; the others (the keyboard) came in after that tick."""
+        self.ticks = ticks
+        """How long the game ran."""
+        self.score = score
+        self.digest = digest
+        """`state_digest` after the last tick."""
+
+    def encode(self) -> bytes:
+        """
+        `HEADER`, then one byte per turn: the direction (2 bits), whether
+        it was an arrival (1 bit) and the ticks since the previous turn (5
+        bits, with longer gaps continued as a varint).
+        """
+        out = bytearray(HEADER.pack(MAGIC, VERSION, self.seed, self.ticks, self.score, self.digest))
+        last = 0
+        for tick, direction, arrival in self.turns:
+            delta = tick - last
+            last = tick
+            out.append(DIRECTIONS.index(direction) << 6 | arrival << 5 | min(delta, DELTA_ESCAPE))
+            if delta >= DELTA_ESCAPE:
+                rest = delta - DELTA_ESCAPE
+                while rest >= 0x80:
+                    out.append(rest & 0x7f | 0x80)
+                    rest >>= 7
+                out.append(rest)
+        return bytes(out)
+
+    @classmethod
+    def decode(cls, data: bytes) -> 'Replay':
+        magic, version, seed, ticks, score, digest = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'not a version {VERSION} replay')
+
+        turns = []
+        last = 0
+        i = HEADER.size
+        while i < len(data):
+            byte = data[i]
+            i += 1
+            delta = byte & 0x1f
+            if delta == DELTA_ESCAPE:
+                shift = 0
+                while True:
+                    b = data[i]
+                    i += 1
+                    delta += (b & 0x7f) << shift
+                    shift += 7
+                    if b < 0x80: break
+            last += delta
+            turns.append((last, DIRECTIONS[byte >> 6], bool(byte & 0x20)))
+        return cls(seed, turns, ticks, score, digest)
+
+    def save(self, path: str):
+        with open(path, 'wb') as f:
+            f.write(self.encode())
+
+    @classmethod
+    def load(cls, path: str) -> 'Replay':
+        with open(path, 'rb') as f:
+            return cls.decode(f.read())
+
+
+class ReplayRecorder:
+    """Records `game` as it's played; becomes the game's `recorder`."""
+
+    def __init__(self, game: Simulation):
+        self.game = game
+        self.replay = Replay(game.rng.seed)
+        game.recorder = self
+
+    def turn(self, direction: str, arrival: bool):
+        """Called by the game whenever Pac Man turns."""
+        self.replay.turns.append((self.game.ticks, direction, arrival))
+
+    def finish(self) -> Replay:
+        """The replay up to now, closed off with the game's current state."""
+        replay = self.replay
+        replay.ticks = self.game.ticks
+        replay.score = self.game.score
+        replay.digest = state_digest(self.game)
+        return replay
+
+    def save(self, directory: str = REPLAY_DIR) -> str:
+        """`finish` and write the replay into `directory`; returns its path."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{time.strftime("%Y%m%d-%H%M%S")}-{self.replay.seed}.pmr')
+        self.finish().save(path)
+        return path
+
+
+class ReplayPlayer:
+    """
+    Plays a `Replay` back on a headless `Simulation`, as fast as it will go.
+
+    On the way through, the game is snapshotted every `keyframe_interval`
+    ticks, so `seek` can jump back (or forward again) from the nearest
+    keyframe instead of from the start.
+    """
+
+    KEYFRAME_INTERVAL = 600
+
+    def __init__(self, replay: Replay, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.replay = replay
+        self.keyframe_interval = keyframe_interval
+        self.keyframes: dict[int, tuple[Simulation, int]] = {}
+        """(game, `next_turn`) per tick."""
+
+        self.game = Simulation(controller=self.controller, seed=replay.seed)
+        self.game.start()
+        self.next_turn = 0
+        """Index into `replay.turns` of the next turn to make."""
+        self.keyframes[0] = self.snapshot()
+
+    def snapshot(self) -> tuple[Simulation, int]:
+        # the controller is our own bound method; keep it pointing at us
+        return copy.deepcopy(self.game, memo={id(self): self}), self.next_turn
+
+    def restore(self, tick: int):
+        game, self.next_turn = self.keyframes[tick]
+        self.game = copy.deepcopy(game, memo={id(self): self})
+
+    def controller(self, game: Simulation) -> str:
+        if self.next_turn < len(self.replay.turns):
+            tick, direction, arrival = self.replay.turns[self.next_turn]
+            if arrival and tick == game.ticks:
+                self.next_turn += 1
+                return direction
+        return None
+
+    def tick(self):
+        turns = self.replay.turns
+        while self.next_turn < len(turns):
+            tick, direction, arrival = turns[self.next_turn]
+            if arrival or tick != self.game.ticks: break
+            self.next_turn += 1
+            self.game.steer(direction)
+
+        self.game.tick()
+        self.game.events.clear()
+        if self.game.ticks % self.keyframe_interval == 0 and self.game.ticks not in self.keyframes:
+            self.keyframes[self.game.ticks] = self.snapshot()
+
+    def seek(self, tick: int) -> Simulation:
+        """The game as it was after `tick` ticks (or at the replay's end)."""
+        tick = min(tick, self.replay.ticks)
+        nearest = max(k for k in self.keyframes if k <= tick)
+        if tick < self.game.ticks or nearest > self.game.ticks:
+            self.restore(nearest)
+        while self.game.ticks < tick and not self.game.over:
+            self.tick()
+        return self.game
+
+    def play_to_end(self) -> Simulation:
+        return self.seek(self.replay.ticks)
+
+    def in_sync(self) -> bool:
+        """Whether the game, played to the end, matches the recording."""
+        return state_digest(self.play_to_end()) == self.replay.digest
@@ -0,0 +1,30 @@
+import random
+
+class GameRng:
+    """
+    Every random choice in one game, derived from a single seed.
+
+    Each consumer (a ghost, the AI's tie-breaks) draws from its own named
+    `stream`, so how often one of them rolls never shifts what another
+    gets: the same seed and the same inputs replay the same game.
+    """
+
+    SEED_RANGE = 2**64
+    """Seeds are taken modulo this, so any int works and every seed fits in
+    a replay's unsigned 64-bit field."""
+
+    def __init__(self, seed: int = None):
+        if seed == None:
+            seed = random.randrange(2**32)
+        self.seed = seed % GameRng.SEED_RANGE
+        """Pass to a new `GameRng` to replay this game."""
+        self.streams: dict[str, random.Random] = {}
+
+    def stream(self, name: str) -> random.Random:
+        """The generator for `name`, created on first use. Seeded from the
+        game's seed and `name` alone (str seeds are hashed with SHA-512, not
+        `hash()`), so it's the same in every process."""
+        rng = self.streams.get(name)
+        if rng == None:
+            rng = self.streams[name] = random.Random(f'{self.seed}/{name}')
+        return rng
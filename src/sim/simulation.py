@@ -0,0 +1,211 @@
+from ghost_ai import GhostMode
+import profiler
+
+from .maze_state import MazeState
+from .play_state import PlayState
+from .rng import GameRng
+from .actors import PlayerState, BlinkyState, PinkyState, InkyState, ClydeState
+
+class Simulation:
+    """
+    One game of Pac Man with all of its rules and none of its pygame: tile
+    consumption, ghost mode timers, the ghost house, collisions and lives.
+    Advance it with `tick()`, one frame at a time, as fast as you like.
+
+    Whatever steers Pac Man is `controller`, called with this simulation each
+    time he reaches a tile; it returns the direction to try next, or None.
+    An optional `planner` hears about each tile ahead of time.
+    Sound cues are queued on `events` (named after `Sound`'s methods) for a
+    front end to drain with `pop_events()`.
+    Two games with the same `seed` whose controllers make the same choices
+    play out identically.
+    """
+    TICKS_PER_SECOND = 60
+    TICK_TIME = 1.0/TICKS_PER_SECOND
+
+    DOT_POINTS = 10
+    POWER_PELLET_POINTS = 50
+    BONUS_FRUIT_POINTS = 100
+    GHOST_POINTS = 200
+
+    def __init__(self, controller=None, planner=None, seed: int = None):
+        self.controller = controller
+        """Callable of (`Simulation`) -> direction, asked at each tile."""
+
+        self.planner = planner
+        """Callable of (`Simulation`), told whenever Pac Man commits to a new
+        `tile_next`, so `controller` can start deciding what to do there."""
+
+        self.recorder = None
+        """Told of every turn Pac Man makes (a `sim.replay.ReplayRecorder`)."""
+
+        self.events: list[str] = []
+        """Sound cues since the last `pop_events()`."""
+
+        self.score = 0
+
+        self.ticks = 0
+        """Frames simulated so far."""
+
+        self.player_speed = 7
+        """The player's movement speed, in tiles per second."""
+
+        self.ghosts_speed = 7
+        """The ghosts' movement speed, in tiles per second."""
+
+        self.rng = GameRng(seed)
+        """All of the game's randomness; random if `seed` isn't given, and
+        `self.rng.seed` replays it."""
+
+        self.maze = MazeState()
+        self.play_state = PlayState(game=self)
+        self.ghosts = []
+        self.player = PlayerState(game=self)
+        self.ghosts = [
+            BlinkyState(game=self),
+            InkyState(game=self),
+            PinkyState(game=self),
+            ClydeState(game=self)
+        ]
+
+        self.phase = 0
+        """The phase of the game.
+        
+        0: New game
+        1: Ready
+        2: Player-controlled gameplay
+        3: Maze cleared
+        4: Level clear message
+        5: Game over"""
+
+        self.over = False
+        """Set once the game over pause has run out."""
+
+    def emit(self, event: str):
+        self.events.append(event)
+
+    def pop_events(self) -> list[str]:
+        events, self.events = self.events, []
+        return events
+
+    def steer(self, direction: str):
+        """Turn Pac Man from outside `tick()`, e.g. from the keyboard."""
+        if self.player.try_set_direction(direction) and self.recorder != None:
+            self.recorder.turn(direction, arrival=False)
+
+    def ghost(self, name: str):
+        for g in self.ghosts:
+            if g.name == name: return g
+        return None
+
+    def set_ghosts_mode(self, mode):
+        for g in self.ghosts:
+            g.set_mode(mode)
+
+    def consume_tile(self, tile: tuple[int, int]):
+        """Eat `tile` and apply what that does to the game."""
+        state = self.maze.consume_tile(tile)
+
+        if state == 1: # blank tile
+            self.emit('stop_chomping')
+        elif state == 2: # food pellet
+            self.emit('start_chomping')
+            self.score += Simulation.DOT_POINTS
+        elif state == 3: # power pellet
+            self.set_ghosts_mode(GhostMode.FRIGHTENED)
+            self.play_state.power_pellet_eatened()
+            self.emit('music_power_pellet')
+            self.score += Simulation.POWER_PELLET_POINTS
+        elif state == 5: # bonus fruit 
+            self.score += Simulation.BONUS_FRUIT_POINTS
+            self.emit('music_eat_fruit')
+        elif state == 6: # portal a
+            self.player.teleport(MazeState.PORTAL_B_TILE)
+        elif state == 7: # portal b
+            self.player.teleport(MazeState.PORTAL_A_TILE)
+
+    def collision_check(self):
+        """Pac Man touches the first ghost whose half-tile box overlaps his."""
+        px, py = self.player.position()
+        for g in self.ghosts:
+            gx, gy = g.position()
+            if abs(px - gx) < 0.5 and abs(py - gy) < 0.5:
+                self.player.ghost_interact(g)
+                return
+    
+    def reset(self, new_round = False):
+        if self.player.lives > 0:
+            self.play_state.reset()
+            self.player.reset()
+            for g in self.ghosts:
+                g.reset()
+
+            if new_round: self.maze.reset()
+
+            self.play_state.action_pause(120)
+            self.phase = 1
+            if self.planner != None: self.planner(self)
+        else:
+            # GAME OVER
+            self.emit('game_over')
+            self.play_state.action_pause(300)
+            self.phase = 5
+
+    def start(self):
+        """Intro pause and music; call once before the first `tick()`."""
+        self.play_state.action_pause(150)
+        self.emit('music_beginning')
+        if self.planner != None: self.planner(self)
+
+    def tick(self):
+        """Advance the game by one frame."""
+        if self.over: return
+        self.ticks += 1
+        self.play_state.update()
+        pausing = self.play_state.is_action_pausing
+
+        if self.phase == 0:
+            if not pausing:
+                self.phase = 1
+                self.play_state.action_pause(100)
+        elif self.phase == 1:
+            # waiting to move on from ready to gameplay
+            if not pausing:
+                self.emit('music_normal')
+                self.phase = 2
+        elif self.phase == 2:
+            if self.maze.remaining_pellets <= 0:
+                self.play_state.action_pause(120)
+                self.emit('stop_all')
+                self.phase = 3
+            elif not pausing:
+                profiler.lap('play_state.update')
+                self.player.update() # asks the controller (AI) at each tile
+                profiler.lap('player.update')
+                for g in self.ghosts:
+                    g.update()
+                profiler.lap('ghosts.update')
+                self.collision_check()
+                profiler.lap('collision_check')
+        elif self.phase == 3:
+            # maze cleared, action pause
+            if not pausing:
+                self.phase = 4
+                self.play_state.action_pause(240)
+        elif self.phase == 4:
+            # clear message, action pause
+            if not pausing:
+                self.play_state.level += 1
+                self.reset(new_round=True)
+        elif self.phase == 5:
+            if not pausing:
+                self.over = True
+
+    def run(self, max_ticks: int = None):
+        """Play from the start until the game is over, or for at most
+        `max_ticks` frames. No front end; events are discarded."""
+        self.start()
+        while not self.over and (max_ticks == None or self.ticks < max_ticks):
+            self.tick()
+            self.events.clear()
+        return self
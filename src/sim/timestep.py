@@ -0,0 +1,49 @@
+import math
+
+class FixedTimestep:
+    """
+    Turns elapsed wall time into a whole number of fixed-length ticks.
+
+    Time carries over between calls, so the simulation runs at exactly
+    `1/tick_time` ticks per second however fast frames are drawn, and every
+    tick sees the same `tick_time` (keeping games reproducible).
+    """
+
+    MAX_TICKS_PER_UPDATE = 8
+    """Most ticks run to catch up in one `advance` at a `time_scale` of 1;
+    the cap grows with `time_scale`. Whole ticks beyond it (a stalled
+    window, a breakpoint) are dropped instead of fast-forwarded."""
+
+    MAX_TIME_SCALE = 16.0
+    """Fastest supported `time_scale`. At 60 fps that is already 16 ticks a
+    frame, all of them sharing the frame with the AI's searches."""
+
+    SNAP_TOLERANCE = 0.0005
+    """Elapsed times this close (in seconds) to a whole number of ticks are
+    rounded to it, so a display running at the tick rate gets one tick per
+    frame instead of jittering between zero and two."""
+
+    def __init__(self, tick_time: float, time_scale: float = 1.0):
+        if not 0 < time_scale <= FixedTimestep.MAX_TIME_SCALE:
+            raise ValueError(f'time_scale must be above 0 and at most {FixedTimestep.MAX_TIME_SCALE}, not {time_scale}')
+        self.tick_time = tick_time
+        self.time_scale = time_scale
+        """Game seconds per real second; above 1 plays faster than real time."""
+        self.max_ticks = math.ceil(FixedTimestep.MAX_TICKS_PER_UPDATE*time_scale)
+        """`MAX_TICKS_PER_UPDATE` scaled to `time_scale`."""
+        self.accumulator = 0.0
+        """Game time not yet simulated, in seconds."""
+
+    def advance(self, elapsed: float) -> int:
+        """Add `elapsed` real seconds; returns how many ticks to run now."""
+        elapsed *= self.time_scale
+        whole = round(elapsed/self.tick_time)
+        if abs(elapsed - whole*self.tick_time) < FixedTimestep.SNAP_TOLERANCE:
+            elapsed = whole*self.tick_time
+
+        self.accumulator += elapsed
+        ticks = int(self.accumulator // self.tick_time)
+        # only whole ticks over the cap are dropped; the partial tick left
+        # over still counts towards the next one
+        self.accumulator -= ticks*self.tick_time
+        return min(ticks, self.max_ticks)
@@ -1,3 +1,7 @@
+import os
+
+PROJECT_DIR = os.path.join(os.path.dirname(__file__), os.pardir)
+
 def clip(value, lower, upper):
     """Returns `value` in the bounds [`lower`, `upper`]"""
     return lower if value < lower else upper if value > upper else value
@@ -6,6 +10,15 @@ def lerp(a, b, ratio):
     # r = clip(ratio, 0, 1)
     return a + (b-a)*ratio
 
+def tile_add(tile: tuple[int, int], vec: tuple[int, int]) -> tuple[int, int]:
+    """`tile` moved by `vec`, for integer tile math without a `Vector`."""
+    return (tile[0] + vec[0], tile[1] + vec[1])
+
+def tile_dist_sq(a: tuple[int, int], b: tuple[int, int]):
+    """Squared straight-line distance between two tiles."""
+    dx, dy = a[0] - b[0], a[1] - b[1]
+    return dx*dx + dy*dy
+
 def get_facing(src: tuple[int, int], dest: tuple[int, int]):
     diff = (dest[0] - src[0], dest[1] - src[1])
     if diff[0] != 0: # horizontal movement